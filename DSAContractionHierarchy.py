@@ -0,0 +1,386 @@
+#Name: Michael Durkan
+# Contraction hierarchy built over a DSAGraph for fast route queries
+
+import math
+import time
+import numpy as np
+from DSALinkedList import DSALinkedList
+from DSAStack import DSAStack
+from DSAHeap import DSAIndexedHeap
+from DSARoadGraph import DSARoute, VertexNotFoundError
+
+# Vertices settled by a witness search before it gives up and adds the
+# shortcut anyway, extra shortcuts cost memory but never correctness
+WITNESS_SETTLE_LIMIT = 60
+
+class DSAContractionHierarchy:
+
+    # CONSTRUCTOR
+    def __init__(self, network):
+        self._network = network
+        self._builtAt = -1
+
+        # Build statistics
+        self.buildTime = 0.0
+        self.numShortcuts = 0
+        self.memoryBytes = 0
+
+    # MUTATOR: build
+    # PURPOSE: Contract every vertex in order of importance, adding shortcuts
+    # that keep shortest route distances between the vertices left, then
+    # store each vertex's arcs to higher ranked vertices as arrays.
+    # Contraction reads and writes single vertices and arcs millions of
+    # times, so the working graph is plain Python lists and dicts, which
+    # cost far less per access than numpy scalars and the DSA linked lists.
+    # Only the result is kept as arrays
+    def build(self):
+        start = time.perf_counter()
+        self._loadNetwork()
+        numVertex = len(self._labels)
+
+        self._contracted = [False] * numVertex
+        self._deletedNeighbours = [0] * numVertex
+        rank = [0] * numVertex
+        # One heap reused by every witness search
+        self._witnessHeap = DSAIndexedHeap(numVertex)
+        self.numShortcuts = 0
+
+        # Order vertices by edge difference, lowest first
+        queue = DSAIndexedHeap(numVertex)
+        for v in range(numVertex):
+            queue.add(v, self._priority(v))
+
+        nextRank = 0
+        while not queue.isEmpty():
+            v = queue.remove()
+            self.numShortcuts += self._contract(v, False)
+            self._contracted[v] = True
+            rank[v] = nextRank
+            nextRank += 1
+
+            # Take v out of its neighbours' arcs, so the working graph only
+            # holds uncontracted vertices. v keeps its own arcs, which all
+            # lead up the hierarchy. Contracting v only changes the
+            # importance of its neighbours
+            for w in self._arcs[v]:
+                del self._arcs[w][v]
+            for w in self._arcs[v]:
+                queue.changeKey(w, self._priority(w))
+
+        self.rank = np.array(rank, dtype = np.int64)
+        self._buildUpwardArrays()
+
+        # Working graph is not needed for queries
+        self._arcs = None
+        self._contracted = None
+        self._deletedNeighbours = None
+        self._witnessHeap = None
+
+        self._builtAt = self._network._modCount
+        self.buildTime = time.perf_counter() - start
+
+    # MUTATOR: _loadNetwork
+    # PURPOSE: Give live vertices compact ids and copy their roads into the
+    # working graph, a dict per vertex of target to (weight, middle, road).
+    # middle is the vertex a shortcut skips over, -1 for an original road
+    def _loadNetwork(self):
+        network = self._network
+        numVertex = network.getVertexCount()
+
+        self._labels = np.empty(numVertex, dtype = object)
+        self._idMap = np.full(network._nextId, -1, dtype = np.int64)
+        self._arcs = [None] * numVertex
+
+        cur = network.vertices.head
+        for v in range(numVertex):
+            self._labels[v] = cur.data._label
+            self._idMap[cur.data._id] = v
+            self._arcs[v] = {}
+            cur = cur.next
+
+        idMap = self._idMap.tolist()
+        cur = network.vertices.head
+        for v in range(numVertex):
+            curEdge = cur.data._edges.head
+            while curEdge is not None:
+                edge = curEdge.data
+                self._arcs[v][idMap[edge.getOther(cur.data)._id]] = (
+                        edge._distance, -1, edge)
+                curEdge = curEdge.next
+            cur = cur.next
+
+    # ACCESSOR: _priority
+    # PURPOSE: Importance of a vertex, twice the shortcuts its contraction
+    # would add less the arcs it removes, plus contracted neighbours to spread
+    # contraction evenly over the network
+    def _priority(self, v):
+        shortcuts = self._contract(v, True)
+        return 2 * (shortcuts - len(self._arcs[v])) + self._deletedNeighbours[v]
+
+    # MUTATOR: _contract
+    # PURPOSE: Find pairs of neighbours of v whose shortest route runs through
+    # v and add a shortcut for each. When simulate is True only count them
+    def _contract(self, v, simulate):
+        # Every neighbour in the working graph is not yet contracted
+        nbrs = [(w, arc[0]) for w, arc in self._arcs[v].items()]
+        numNbrs = len(nbrs)
+
+        numShortcuts = 0
+        for i in range(numNbrs - 1):
+            u, uWeight = nbrs[i]
+            later = nbrs[i + 1:]
+
+            # Search from one neighbour, avoiding v, as far as the longest
+            # route through v to a later neighbour
+            maxDist = uWeight + max(weight for w, weight in later)
+            targets = set(w for w, weight in later)
+            dist = self._witnessSearch(u, v, maxDist, targets)
+
+            for w, wWeight in later:
+                viaDist = uWeight + wWeight
+                if dist.get(w, math.inf) > viaDist:
+                    numShortcuts += 1
+                    if not simulate:
+                        self._addShortcut(u, w, viaDist, v)
+
+        if not simulate:
+            for w, weight in nbrs:
+                self._deletedNeighbours[w] += 1
+
+        return numShortcuts
+
+    # ACCESSOR: _witnessSearch
+    # PURPOSE: Dijkstra from source over the working graph other than
+    # avoid, stopping past maxDist, the settle limit or once every vertex in
+    # targets is settled. Returns the dict of distances found
+    def _witnessSearch(self, source, avoid, maxDist, targets):
+        arcs = self._arcs
+        dist = {source: 0}
+        heap = self._witnessHeap
+        heap.clear()
+        heap.add(source, 0)
+        numTargets = len(targets)
+        numSettled = 0
+        searching = True
+
+        while searching and not heap.isEmpty():
+            u = int(heap.peek())
+            uDist = dist[u]
+
+            if (uDist > maxDist or numSettled >= WITNESS_SETTLE_LIMIT or
+                    numTargets == 0):
+                searching = False
+            else:
+                heap.remove()
+                numSettled += 1
+                if u in targets:
+                    numTargets -= 1
+
+                for w, arc in arcs[u].items():
+                    newDist = uDist + arc[0]
+                    # A settled vertex is never shortened, so one already
+                    # reached with a longer distance is still in the heap
+                    if w != avoid and newDist < dist.get(w, math.inf):
+                        if w in dist:
+                            heap.decreaseKey(w, newDist)
+                        else:
+                            heap.add(w, newDist)
+                        dist[w] = newDist
+
+        return dist
+
+    # MUTATOR: _addShortcut
+    # PURPOSE: Join u and w with a shortcut through middle in both directions,
+    # or shorten the arc already between them
+    def _addShortcut(self, u, w, weight, middle):
+        self._setArc(u, w, weight, middle)
+        self._setArc(w, u, weight, middle)
+
+    def _setArc(self, u, w, weight, middle):
+        arc = self._arcs[u].get(w)
+        if arc is None or weight < arc[0]:
+            self._arcs[u][w] = (weight, middle, None)
+
+    # MUTATOR: _buildUpwardArrays
+    # PURPOSE: Store arcs leading to higher ranked vertices in compressed
+    # sparse row arrays, each row sorted by target
+    def _buildUpwardArrays(self):
+        numVertex = len(self._labels)
+        rank = self.rank.tolist()
+        indptr = [0] * (numVertex + 1)
+        indices = []
+        weights = []
+        middles = []
+        edges = []
+
+        for v in range(numVertex):
+            for w in sorted(self._arcs[v]):
+                if rank[w] > rank[v]:
+                    weight, middle, edge = self._arcs[v][w]
+                    indices.append(w)
+                    weights.append(weight)
+                    middles.append(middle)
+                    edges.append(edge)
+            indptr[v + 1] = len(indices)
+
+        self.upIndptr = np.array(indptr, dtype = np.int64)
+        self.upIndices = np.array(indices, dtype = np.int32)
+        self.upWeights = np.array(weights, dtype = np.int64)
+        self.upMiddle = np.array(middles, dtype = np.int32)
+        self.upEdges = np.empty(len(edges), dtype = object)
+        self.upEdges[:] = edges
+
+        # Queries step through single arcs, so they read list copies. One
+        # heap per search direction, reused by every query
+        self._queryIndptr = indptr
+        self._queryIndices = indices
+        self._queryWeights = weights
+        self._queryHeaps = (DSAIndexedHeap(numVertex), DSAIndexedHeap(numVertex))
+
+        # Object array holds one pointer per arc
+        self.memoryBytes = (self.upIndptr.nbytes + self.upIndices.nbytes +
+                self.upWeights.nbytes + self.upMiddle.nbytes +
+                self.upEdges.nbytes + self.rank.nbytes + self._idMap.nbytes +
+                self._labels.nbytes)
+
+    # ACCESSOR: printBuildReport
+    def printBuildReport(self):
+        print("Contraction hierarchy of " + str(len(self._labels)) + " locations")
+        print(f"  Preprocessing time: {self.buildTime:.2f}s")
+        print("  Shortcuts added: " + str(self.numShortcuts) + " (" +
+                str(self._network.getEdgeCount()) + " roads)")
+        print(f"  Memory overhead: {self.memoryBytes / 1024:.1f} KiB")
+
+    # ACCESSOR: shortestPath
+    # PURPOSE: Bidirectional search over upward arcs only. Returns a DSARoute
+    # with shortcuts unpacked into the original roads, or None if no route.
+    # Rebuilds the hierarchy first if the network has changed. A query only
+    # reaches a few hundred vertices, so its state is dicts of the vertices
+    # reached rather than arrays over the whole network
+    def shortestPath(self, source, destination):
+        sourceVertex, destVertex = self._network._getRouteEnds(source, destination)
+        if self._builtAt != self._network._modCount:
+            self.build()
+
+        s = int(self._idMap[sourceVertex._id])
+        t = int(self._idMap[destVertex._id])
+        indptr = self._queryIndptr
+        indices = self._queryIndices
+        weights = self._queryWeights
+
+        dist = ({s: 0}, {t: 0})
+        prevArc = ({}, {})
+        prevVertex = ({}, {})
+        heaps = self._queryHeaps
+        heaps[0].clear()
+        heaps[1].clear()
+        heaps[0].add(s, 0)
+        heaps[1].add(t, 0)
+        best = math.inf
+        meet = -1
+        numSettled = 0
+        searching = True
+
+        while searching:
+            # Take the side with the closer frontier, empty side counts as inf
+            top = [math.inf, math.inf]
+            for side in range(2):
+                if not heaps[side].isEmpty():
+                    top[side] = dist[side][heaps[side].peek()]
+            side = 0 if top[0] <= top[1] else 1
+
+            # Nothing left on either side can beat best
+            if top[side] >= best:
+                searching = False
+            else:
+                v = int(heaps[side].remove())
+                sideDist = dist[side]
+                vDist = sideDist[v]
+                numSettled += 1
+                if v in dist[1 - side] and vDist + dist[1 - side][v] < best:
+                    best = vDist + dist[1 - side][v]
+                    meet = v
+
+                start = indptr[v]
+                end = indptr[v + 1]
+
+                # Stall on demand, a higher ranked neighbour already offers a
+                # shorter way to v so v cannot be on the shortest route
+                stalled = False
+                pos = start
+                while pos < end and not stalled:
+                    stalled = sideDist.get(indices[pos], math.inf) + weights[pos] < vDist
+                    pos += 1
+
+                pos = start
+                while pos < end and not stalled:
+                    w = indices[pos]
+                    newDist = vDist + weights[pos]
+                    if newDist < sideDist.get(w, math.inf):
+                        if w in sideDist:
+                            heaps[side].decreaseKey(w, newDist)
+                        else:
+                            heaps[side].add(w, newDist)
+                        sideDist[w] = newDist
+                        prevArc[side][w] = pos
+                        prevVertex[side][w] = v
+                    pos += 1
+
+        route = None
+        if meet != -1:
+            route = self._buildRoute(meet, prevArc, prevVertex, int(best), numSettled)
+
+        return route
+
+    # ACCESSOR: _buildRoute
+    # PURPOSE: Join the two upward search trees at the meeting vertex and
+    # unpack every arc into roads in travel order
+    def _buildRoute(self, meet, prevArc, prevVertex, distance, numSettled):
+        locations = DSALinkedList()
+        roads = DSALinkedList()
+
+        # Arcs from source up to the meeting vertex, collected backwards
+        upArcs = DSAStack()
+        v = meet
+        while v in prevArc[0]:
+            upArcs.push((prevVertex[0][v], v, prevArc[0][v]))
+            v = prevVertex[0][v]
+
+        locations.insertLast(self._labels[v])
+        while not upArcs.isEmpty():
+            fromV, toV, arc = upArcs.pop()
+            self._unpackArc(fromV, toV, arc, locations, roads)
+
+        # Arcs from the meeting vertex down to the destination
+        v = meet
+        while v in prevArc[1]:
+            self._unpackArc(v, prevVertex[1][v], prevArc[1][v], locations, roads)
+            v = prevVertex[1][v]
+
+        return DSARoute(distance, locations, roads, numSettled)
+
+    # MUTATOR: _unpackArc
+    # PURPOSE: Append the roads of an arc travelled fromV to toV, replacing
+    # each shortcut with the two arcs through its middle vertex
+    def _unpackArc(self, fromV, toV, arc, locations, roads):
+        pending = DSAStack()
+        pending.push((fromV, toV, arc))
+
+        while not pending.isEmpty():
+            fromV, toV, arc = pending.pop()
+            middle = self.upMiddle[arc]
+            if middle == -1:
+                roads.insertLast(self.upEdges[arc])
+                locations.insertLast(self._labels[toV])
+            else:
+                # Middle is lower ranked than both ends so the arcs to it
+                # are stored in its row. Second half pushed first
+                pending.push((middle, toV, self._findArc(middle, toV)))
+                pending.push((fromV, middle, self._findArc(middle, fromV)))
+
+    # ACCESSOR: _findArc
+    # PURPOSE: Binary search row of v for the arc to w
+    def _findArc(self, v, w):
+        start = self.upIndptr[v]
+        end = self.upIndptr[v + 1]
+        return start + np.searchsorted(self.upIndices[start:end], w)
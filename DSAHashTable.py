@@ -0,0 +1,226 @@
+#Name: Michael Durkan
+# General purpose hash table, maps string keys to any value
+
+import math
+import zlib
+import numpy as np
+
+class Error(Exception):
+    pass
+
+class KeyNotFoundError(Exception):
+    def __init__(self, message):
+        self.message = message
+
+# Seed of the second crc in a hash code, any value other than 0 will do
+STEP_SEED = 0x9E3779B9
+
+class _DSAHashEntry:
+    __slots__ = ("key", "value", "state", "hashCode")
+
+    def __init__(self, key = None, value = None, hashCode = 0):
+        # Set key to input otherwise set key to empty string if not input
+        if key is not None:
+            self.key = key
+        else:
+            self.key = ""
+
+        self.value = value
+        # Hash code of the key, kept so a resize never hashes it again
+        self.hashCode = hashCode
+
+        # States: 0 = never used, 1 = used, -1 = formerly-used
+        # Set state to 1 if key input otherwise set it to 0
+        if key is not None:
+            self.state = 1
+        else:
+            self.state = 0
+
+# Same double hashing scheme as VehicleHashTable, but keyed on any string
+class DSAHashTable:
+    def __init__(self, tableSize = 11):
+        if tableSize < 5:
+            tableSize = 5
+        # Set actual size to nextPrime of table size
+        actualSize = self._nextPrime(tableSize)
+
+        # Allocate hash array size of actual size with hash entries
+        self.hashArray = np.empty(actualSize, dtype = object)
+        for i in range(actualSize):
+            self.hashArray[i] = _DSAHashEntry()
+
+        self.count = 0
+
+        # Upper and lower threshold values for load factor - resizing
+        self.lowerThreshold = 0.2
+        self.upperThreshold = 0.7
+
+    # Hash code of a key from two crc32s of its bytes, computed in C rather
+    # than a Python loop per character and well spread for labels that
+    # differ only in a digit. The step comes from the seeded crc alone, so
+    # keys that share a home slot rarely share a probe sequence
+    def _hashCode(self, key):
+        data = key.encode()
+        return (zlib.crc32(data, STEP_SEED) << 31) ^ zlib.crc32(data)
+
+    # Home slot of a hash code
+    def _hash(self, hashCode):
+        return hashCode % len(self.hashArray)
+
+    # stepHash function for calculating the step size in double hashing,
+    # from the high bits of the hash code
+    def _stepHash(self, hashCode):
+        return 5 - ((hashCode >> 32) % 5)
+
+    # Next prime improved from lecture slides
+    def _nextPrime(self, startVal):
+        if startVal % 2 == 0:
+            primeVal = startVal - 1
+        else:
+            primeVal = startVal
+
+        isPrime = False
+
+        while not isPrime:
+            primeVal += 2
+            ii = 3
+            isPrime = True
+            rootVal = math.isqrt(primeVal)
+
+            while ii <= rootVal and isPrime:
+                if primeVal % ii == 0:
+                    isPrime = False
+                else:
+                    ii += 2
+
+        return primeVal
+
+    def getLoadFactor(self):
+        return self.count / len(self.hashArray)
+
+    def getCount(self):
+        return self.count
+
+    # MUTATOR: reserve
+    # PURPOSE: Grow the table once so count keys fit under the load factor,
+    # saving the repeated resizes of inserting them one at a time
+    def reserve(self, count):
+        if count / len(self.hashArray) >= self.upperThreshold:
+            self._resize(int(count / self.upperThreshold) + 1)
+
+    def insert(self, key, value):
+        if self.getLoadFactor() >= self.upperThreshold:
+            self._resize(len(self.hashArray) * 2)
+
+        hashCode = self._hashCode(key)
+        idx = self._findSlot(key, hashCode)
+        while idx == -1: # Table is full, grow it and probe again
+            self._resize(len(self.hashArray) * 2)
+            idx = self._findSlot(key, hashCode)
+
+        # Slot already holds the key so replace the value
+        entry = self.hashArray[idx]
+        if entry.state == 1:
+            entry.value = value
+        else:
+            self.hashArray[idx] = _DSAHashEntry(key, value, hashCode)
+            self.count += 1
+
+    # Return the slot holding key, or if it isnt in the table the first
+    # free slot on its probe sequence. A formerly used slot is only reused
+    # once the sequence reaches a never used one, so a key stored past it
+    # is never added a second time. Returns -1 if the table is full
+    def _findSlot(self, key, hashCode):
+        # Get hash value and step size for double hashing
+        hashIdx = self._hash(hashCode)
+        stepSize = self._stepHash(hashCode)
+        origIdx = hashIdx # Store in case hashtable is full
+        freeIdx = -1
+        found = False
+        giveUp = False
+
+        # Probe for key location
+        while not found and not giveUp:
+            entry = self.hashArray[hashIdx]
+
+            # Key is found, compare the cached hash before the key
+            if entry.state == 1:
+                found = entry.hashCode == hashCode and entry.key == key
+
+            elif entry.state == 0: # Stop if at a never used entry
+                giveUp = True
+
+            elif freeIdx == -1: # First formerly used entry
+                freeIdx = hashIdx
+
+            if not found and not giveUp: # Probe to next slot using double hashing
+                hashIdx = (hashIdx + stepSize) % len(self.hashArray)
+                if hashIdx == origIdx: # Stop if checked all slots
+                    giveUp = True
+                    hashIdx = -1
+
+        if not found and freeIdx != -1:
+            hashIdx = freeIdx
+
+        return hashIdx
+
+    def _findKey(self, key):
+        idx = self._findSlot(key, self._hashCode(key))
+        if idx != -1 and self.hashArray[idx].state != 1:
+            idx = -1
+
+        return idx
+
+    # ACCESSOR: search
+    # PURPOSE: Return value stored for key, raise error if key doesnt exist
+    def search(self, key):
+        idx = self._findKey(key)
+        if idx == -1:
+            raise KeyNotFoundError("Key not found in hash table")
+        return self.hashArray[idx].value
+
+    # ACCESSOR: lookup
+    # PURPOSE: Return value stored for key, or None if key doesnt exist
+    def lookup(self, key):
+        idx = self._findKey(key)
+        value = None
+        if idx != -1:
+            value = self.hashArray[idx].value
+        return value
+
+    def hasKey(self, key):
+        return self._findKey(key) != -1
+
+    def delete(self, key):
+        idx = self._findKey(key)
+        if idx == -1:
+            raise KeyNotFoundError("Key not found in hash table")
+
+        # Set state as previously used and release the value
+        self.hashArray[idx].state = -1
+        self.hashArray[idx].value = None
+        self.count -= 1
+
+        # Shrink table when it becomes sparse
+        if self.getLoadFactor() < self.lowerThreshold and len(self.hashArray) > 11:
+            self._resize(max(len(self.hashArray) // 2, 11))
+
+    def _resize(self, newSize):
+        # Recalculate new prime after doubling/halving
+        newSize = self._nextPrime(newSize)
+
+        oldHashArr = self.hashArray
+        self.hashArray = np.empty(newSize, dtype = object)
+        for i in range(newSize):
+            self.hashArray[i] = _DSAHashEntry()
+
+        # Move the live entries across by their cached hash codes. The new
+        # array has no formerly used slots and no key twice, so each entry
+        # goes in the first never used slot on its probe sequence
+        for entry in oldHashArr:
+            if entry.state == 1:
+                hashIdx = self._hash(entry.hashCode)
+                stepSize = self._stepHash(entry.hashCode)
+                while self.hashArray[hashIdx].state != 0:
+                    hashIdx = (hashIdx + stepSize) % newSize
+                self.hashArray[hashIdx] = entry
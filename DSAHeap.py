@@ -11,6 +11,8 @@ class HeapEmptyError(Exception):
         self.message = message
 
 class DSAHeapEntry:
+    __slots__ = ("_priority", "_value")
+
     def __init__(self, inPriority, inValue):
         self._priority = inPriority
         self._value = inValue
@@ -143,6 +145,147 @@ class DSAHeap:
         for i in range(size):
             self.heapArr[i] = inEntries[i]
 
+# Min heap over integer keys 0 to capacity - 1. A position array records
+# where each key sits in the heap so its priority can be lowered in place
+# (decrease-key) instead of adding a duplicate entry
+class DSAIndexedHeap:
+    def __init__(self, capacity):
+        self.count = 0
+        self.capacity = capacity
+        # Heap position -> key, key -> heap position (-1 when not in heap)
+        self.keyArr = np.empty(capacity, dtype = np.int64)
+        self.posArr = np.full(capacity, -1, dtype = np.int64)
+        self.priorityArr = np.zeros(capacity, dtype = np.float64)
+
+        # Sifting reads and writes single entries, which is much cheaper
+        # through a memoryview than by indexing the numpy arrays
+        self._keyView = memoryview(self.keyArr)
+        self._posView = memoryview(self.posArr)
+        self._priorityView = memoryview(self.priorityArr)
+
+    def isEmpty(self):
+        return self.count == 0
+
+    def contains(self, key):
+        return self._posView[key] != -1
+
+    def getPriority(self, key):
+        return self._priorityView[key]
+
+    def add(self, key, inPriority):
+        if self._posView[key] != -1:
+            raise ValueError("Key " + str(key) + " is already in heap")
+
+        # Enter key at bottom of heap and trickle it up
+        self._priorityView[key] = inPriority
+        self._keyView[self.count] = key
+        self._posView[key] = self.count
+        self.count += 1
+        self._trickleUp(self.count - 1)
+
+    def decreaseKey(self, key, inPriority):
+        if self._posView[key] == -1:
+            raise ValueError("Key " + str(key) + " is not in heap")
+
+        # A lower priority can only move the entry towards the root
+        self._priorityView[key] = inPriority
+        self._trickleUp(self._posView[key])
+
+    def changeKey(self, key, inPriority):
+        if self._posView[key] == -1:
+            raise ValueError("Key " + str(key) + " is not in heap")
+
+        # Entry moves up for a lower priority and down for a higher one
+        oldPriority = self._priorityView[key]
+        self._priorityView[key] = inPriority
+        if inPriority < oldPriority:
+            self._trickleUp(self._posView[key])
+        else:
+            self._trickleDown(self._posView[key])
+
+    # MUTATOR: clear
+    # PURPOSE: Empty the heap in time proportional to its entries, so one
+    # heap can be reused for many small searches
+    def clear(self):
+        self.posArr[self.keyArr[:self.count]] = -1
+        self.count = 0
+
+    def peek(self):
+        if self.count == 0:
+            raise HeapEmptyError("Heap has no entries")
+        return self._keyView[0]
+
+    def remove(self):
+        if self.count == 0:
+            raise HeapEmptyError("Heap has no entries")
+
+        # Reduce count and store the root
+        self.count -= 1
+        root = self._keyView[0]
+        self._posView[root] = -1
+
+        if self.count > 0:
+            # Move last key to the root and trickle it down
+            self._place(0, self._keyView[self.count])
+            self._trickleDown(0)
+
+        return root
+
+    def _place(self, idx, key):
+        self._keyView[idx] = key
+        self._posView[key] = idx
+
+    # Keys moved on the way are written straight to the views rather than
+    # through _place, as sifting is most of the heap's work
+    def _trickleUp(self, inIdx):
+        keys = self._keyView
+        positions = self._posView
+        priorities = self._priorityView
+        key = keys[inIdx]
+        priority = priorities[key]
+        parentIdx = (inIdx - 1) // 2
+
+        # While cur not root and cur priority < parent priority
+        while inIdx > 0 and priority < priorities[keys[parentIdx]]:
+            parent = keys[parentIdx]
+            keys[inIdx] = parent
+            positions[parent] = inIdx
+            inIdx = parentIdx
+            parentIdx = (inIdx - 1) // 2
+
+        keys[inIdx] = key
+        positions[key] = inIdx
+
+    def _trickleDown(self, inIdx):
+        keys = self._keyView
+        positions = self._posView
+        priorities = self._priorityView
+        count = self.count
+        key = keys[inIdx]
+        priority = priorities[key]
+        lChildIdx = inIdx * 2 + 1
+        keepGoing = True
+
+        while keepGoing and lChildIdx < count:
+            keepGoing = False
+            smallIdx = lChildIdx
+            rChildIdx = lChildIdx + 1
+
+            if rChildIdx < count:
+                if priorities[keys[rChildIdx]] < priorities[keys[lChildIdx]]:
+                    smallIdx = rChildIdx
+
+            small = keys[smallIdx]
+            if priorities[small] < priority:
+                keys[inIdx] = small
+                positions[small] = inIdx
+                inIdx = smallIdx
+                lChildIdx = (inIdx * 2) + 1
+                keepGoing = True
+
+        keys[inIdx] = key
+        positions[key] = inIdx
+
 if __name__ == "__main__":
     heap = DSAHeap()
     heap.add(5, "A")
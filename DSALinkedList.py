@@ -14,6 +14,8 @@ class ListEmptyError(Exception):
 # NAME: _DSAListNode
 # PURPOSE: Provide node functionality for the linked list
 class _DSAListNode:
+    # Fixed attributes, no per node __dict__
+    __slots__ = ("data", "prev", "next")
     
     # CONSTRUCTOR
     def __init__(self, inData):
@@ -111,6 +113,28 @@ class DSALinkedList:
         
         self.size += 1
 
+        return newNd
+
+    # MUTATOR: insertBefore
+    # PURPOSE: Insert data in front of a node of this list, or at the end
+    # of the list if node is None
+    def insertBefore(self, node, newData):
+        if node is None:
+            newNd = self.insertLast(newData)
+        elif node.prev is None:
+            self.insertFirst(newData)
+            newNd = self.head
+        else:
+            newNd = _DSAListNode(newData)
+            # Link new node between node and its previous
+            newNd.setPrev(node.prev)
+            newNd.setNext(node)
+            node.prev.setNext(newNd)
+            node.setPrev(newNd)
+            self.size += 1
+
+        return newNd
+
     # MUTATOR: removeFirst
     def removeFirst(self):
         # Raise error if already empty
@@ -153,6 +177,27 @@ class DSALinkedList:
 
         return nodeData
 
+    # MUTATOR: removeNode
+    # PURPOSE: Unlink a node already in this list, return its data
+    def removeNode(self, node):
+        # If node is the head update head to next
+        if node.prev is None:
+            self.head = node.next
+        else:
+            node.prev.next = node.next
+
+        # If node is the tail update tail to previous
+        if node.next is None:
+            self.tail = node.prev
+        else:
+            node.next.prev = node.prev
+
+        node.prev = None
+        node.next = None
+        self.size -= 1
+
+        return node.data
+
     def printList(self):
         print("List Contents: ")
         currNd = self.head
@@ -6,9 +6,16 @@ from DSALinkedList import DSALinkedList, ListEmptyError
 from DSAsorts import selectionSort
 from DSAQueue import DSAQueue, QueueUnderflowError
 from DSAStack import DSAStack, StackUnderflowError
+from DSAHashTable import DSAHashTable
+from DSAHeap import DSAIndexedHeap
 
+import math
+import zlib
 import numpy as np
 
+# Mean radius of the earth in kilometres
+EARTH_RADIUS_KM = 6371.0
+
 class Error(Exception):
     pass
 
@@ -24,55 +31,207 @@ class DuplicateEdgeError(Exception):
     def __init__(self, message):
         self.message = message
 
+# NAME: haversineDistance
+# PURPOSE: Great circle distance in kilometres between two coordinates
+def haversineDistance(lat1, long1, lat2, long2):
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dPhi = phi2 - phi1
+    dLambda = math.radians(long2 - long1)
+
+    a = (math.sin(dPhi / 2) ** 2 +
+            math.cos(phi1) * math.cos(phi2) * math.sin(dLambda / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
 class _DSAGraphVertex:
+    # Fixed attributes, no per vertex __dict__
+    __slots__ = ("_label", "_id", "_latitude", "_longitude", "_edges")
 
     # CONSTRUCTOR
-    def __init__(self, inLabel):
+    def __init__(self, inLabel, inId = -1, latitude = None, longitude = None):
         self._label = inLabel
-        self._visited = False
+        # Integer id given by the graph, used to index per query arrays
+        self._id = inId
+        # Optional coordinates in degrees, None when not known
+        self._latitude = latitude
+        self._longitude = longitude
+        # Roads at this vertex kept in alphabetical order of neighbour, each
+        # road is also held by the neighbour
+        self._edges = DSALinkedList()
     
     # To String
     def __str__(self):
-        return ("Label: " + str(self._label) +
-                ", Vertex Visited State: " + str(self._visited))
+        return "Label: " + str(self._label)
     
+# A road, held once and shared by the edge lists of both its end vertices
 class _DSAGraphEdge:
+    __slots__ = ("_vertex1", "_vertex2", "_distance", "_roadName", "_roadId",
+            "_inForest", "_node1", "_node2")
 
     # CONSTRUCTOR
-    def __init__(self, inVertex1, inVertex2, roadName, distance):
+    def __init__(self, inVertex1, inVertex2, roadName, distance, roadId = -1):
         self._vertex1 = inVertex1
         self._vertex2 = inVertex2
         # Weight used for storing distances between locations
         self._distance = distance
+        # Name and its id in the graph's road name table, the name string
+        # is shared by every road with that name
         self._roadName = roadName
-        self._visited = False
+        self._roadId = roadId
+        # True when the road is in the graph's spanning forest
+        self._inForest = False
+        # This road's list nodes in vertex1's and vertex2's edge lists
+        self._node1 = None
+        self._node2 = None
+
+    # ACCESSOR: getOther
+    # PURPOSE: Return the end of the road that isn't the input vertex
+    def getOther(self, vertex):
+        other = self._vertex1
+        if vertex is self._vertex1:
+            other = self._vertex2
+        return other
 
     # To String
     def __str__(self):
         return ("Location 1: " + str(self._vertex1) + "\nLocation 2: " + 
-                str(self._vertex2) + "\nEdge Visited State: " 
-                + str(self._visited) + "\n" + "Road Name: " + 
+                str(self._vertex2) + "\n" + "Road Name: " + 
                 str(self._roadName) + "\n" + "Road Distance: " + str(self._distance))
 
+# Result of a route query: total distance, the locations passed through
+# and the roads (graph edges) between them in travel order
+class DSARoute:
+
+    # CONSTRUCTOR
+    def __init__(self, distance, locations, roads, settled):
+        self._distance = distance
+        self._locations = locations
+        self._roads = roads
+        # Number of vertices the search settled to find the route
+        self._settled = settled
+
+    def getDistance(self):
+        return self._distance
+
+    def getLocations(self):
+        return self._locations
+
+    def getRoads(self):
+        return self._roads
+
+    def getSettledCount(self):
+        return self._settled
+
+    # To String
+    def __str__(self):
+        routeStr = "Route Distance: " + str(self._distance) + "\n"
+        curLoc = self._locations.head
+        curRoad = self._roads.head
+        routeStr += "  " + str(curLoc.data) + "\n"
+        while curRoad is not None:
+            curLoc = curLoc.next
+            routeStr += ("    via " + str(curRoad.data._roadName) + " (" +
+                    str(curRoad.data._distance) + ")\n  " + str(curLoc.data) + "\n")
+            curRoad = curRoad.next
+        return routeStr
+
 class DSAGraph:
 
     # CONSTRUCTOR
     def __init__(self):
         self.vertices = DSALinkedList()
-        self.edges = DSALinkedList()
+        # Roads are stored on their end vertices so only a count is kept here
+        self._edgeCount = 0
+        # Index of label to vertex list node for constant time lookups
+        self._vertexIndex = DSAHashTable()
+        # Vertices by integer id. Ids are dense, 0 up to the vertex count,
+        # handed out in insertion order and reused when vertices are deleted
+        self._vertexById = np.empty(16, dtype = object)
+        self._nextId = 0
+        # Vertices with both coordinates, A* only runs when all have them
+        self._numWithCoordinates = 0
+        # Interned road names, each distinct name is stored once and roads
+        # refer to it by id
+        self._roadNameIndex = DSAHashTable()
+        self._roadNames = np.empty(16, dtype = object)
+        self._numRoadNames = 0
+        # Connected component label of each vertex id, with a spanning
+        # forest of roads flagged _inForest holding each component together.
+        # Labels are recycled through a free stack so there are never more
+        # labels than vertex ids
+        self._componentOf = np.empty(16, dtype = np.int64)
+        self._componentSize = np.zeros(16, dtype = np.int64)
+        self._nextComponent = 0
+        self._freeComponents = DSAStack()
+        # Search marks for splitting the forest when a road is deleted
+        self._forestStamp = np.zeros(16, dtype = np.int64)
+        self._stampCount = 0
+        # Counts every change to locations or roads, lets structures built
+        # from the graph tell when they are out of date
+        self._modCount = 0
+        # Landmark distance table for ALT routing, rebuilt when roads change
+        self._landmarkIds = None
+        self._landmarkDist = None
+        self._numLandmarks = 8
+        self._landmarksStale = False
 
     # MUTATOR: addVertex
-    def addVertex(self, inLabel):
+    def addVertex(self, inLabel, latitude = None, longitude = None):
         # Create vertex only if one with same label doesnt exist already
         if not self.hasVertex(inLabel):
-            # Create graph vertex with input label and value
-            vertex = _DSAGraphVertex(inLabel)
-            # Insert that vertex onto the end of the linkedlist
-            self.vertices.insertLast(vertex)
+            # Grow the id arrays when full
+            if self._nextId >= len(self._vertexById):
+                self._growIdArrays(len(self._vertexById) * 2)
+
+            # Create graph vertex with input label and next free id, in a
+            # component of its own
+            vertex = _DSAGraphVertex(inLabel, self._nextId, latitude, longitude)
+            self._vertexById[self._nextId] = vertex
+            component = self._newComponent()
+            self._componentOf[self._nextId] = component
+            self._componentSize[component] = 1
+            self._nextId += 1
+            self._modCount += 1
+            if latitude is not None and longitude is not None:
+                self._numWithCoordinates += 1
+
+            # Insert that vertex onto the end of the linkedlist and index
+            # its list node by label
+            node = self.vertices.insertLast(vertex)
+            self._vertexIndex.insert(inLabel, node)
         
         else:
             raise DuplicateVertexError("Vertex " + inLabel + " exists already")
 
+    # MUTATOR: reserve
+    # PURPOSE: Make room for numVertex more locations up front, so a bulk
+    # load doesnt keep regrowing the id arrays and label index
+    def reserve(self, numVertex):
+        total = self._nextId + numVertex
+        if total > len(self._vertexById):
+            self._growIdArrays(total)
+        self._vertexIndex.reserve(total)
+
+    # MUTATOR: _growIdArrays
+    # PURPOSE: Resize every array indexed by vertex id
+    def _growIdArrays(self, newSize):
+        newArr = np.empty(newSize, dtype = object)
+        newArr[:self._nextId] = self._vertexById[:self._nextId]
+        self._vertexById = newArr
+
+        newComponentOf = np.empty(newSize, dtype = np.int64)
+        newComponentOf[:self._nextId] = self._componentOf[:self._nextId]
+        self._componentOf = newComponentOf
+
+        # Labels and stamps can be anywhere in the old arrays
+        newComponentSize = np.zeros(newSize, dtype = np.int64)
+        newComponentSize[:len(self._componentSize)] = self._componentSize
+        self._componentSize = newComponentSize
+
+        newStamp = np.zeros(newSize, dtype = np.int64)
+        newStamp[:len(self._forestStamp)] = self._forestStamp
+        self._forestStamp = newStamp
+
     # MUTATOR: addEdge
     def addEdge(self, inVertex1, inVertex2, roadName, distance):
         # Get the vertexes input for edge to be between
@@ -100,42 +259,75 @@ class DSAGraph:
 
         # Only create edge if Vertices aren't adjacent (edge exists already)
         # otherwise raise error
-        if not self.isAdjacent(inVertex1, inVertex2):
-            # Create edge object between input vertices and place on end
-            # of edge list
-            edge = _DSAGraphEdge(vertex1, vertex2, roadName, distance)
-            self.edges.insertLast(edge)
-            
-            # add the reverse edge
-            edgeRev = _DSAGraphEdge(vertex2, vertex1, roadName, distance)
-            self.edges.insertLast(edgeRev)
+        if self._findEdgeNode(vertex1, vertex2) is None:
+            # Create one edge object between input vertices and place it in
+            # both vertices' edge lists
+            roadId = self._internRoadName(roadName)
+            edge = _DSAGraphEdge(vertex1, vertex2, self._roadNames[roadId],
+                    distance, roadId)
+            edge._node1 = self._insertEdgeSorted(vertex1, edge)
+            edge._node2 = self._insertEdgeSorted(vertex2, edge)
+
+            self._edgeCount += 1
+            self._modCount += 1
+            self._landmarksStale = True
+
+            # A road between two components joins them and becomes part of
+            # the spanning forest
+            if self._componentOf[vertex1._id] != self._componentOf[vertex2._id]:
+                edge._inForest = True
+                self._mergeComponents(vertex1, vertex2)
         
         else:
             raise DuplicateEdgeError("Edge between vertices " + inVertex1 + 
                     " and " + inVertex2 + " exists already")
     
+    # MUTATOR: _internRoadName
+    # PURPOSE: Return id of a road name in the name table, adding it if new
+    def _internRoadName(self, roadName):
+        roadId = self._roadNameIndex.lookup(roadName)
+
+        if roadId is None:
+            if self._numRoadNames >= len(self._roadNames):
+                newNames = np.empty(len(self._roadNames) * 2, dtype = object)
+                newNames[:self._numRoadNames] = self._roadNames[:self._numRoadNames]
+                self._roadNames = newNames
+
+            roadId = self._numRoadNames
+            self._roadNames[roadId] = roadName
+            self._roadNameIndex.insert(roadName, roadId)
+            self._numRoadNames += 1
+
+        return roadId
+
+    # MUTATOR: _insertEdgeSorted
+    # PURPOSE: Place edge in vertex's edge list keeping neighbours in
+    # alphabetical order, so adjacent vertices never need sorting. Returns
+    # the new list node
+    def _insertEdgeSorted(self, vertex, edge):
+        label = edge.getOther(vertex)._label
+        cur = vertex._edges.head
+
+        # Find first edge whose neighbour comes after the new neighbour
+        while cur is not None and cur.data.getOther(vertex)._label < label:
+            cur = cur.next
+
+        return vertex._edges.insertBefore(cur, edge)
+
     # ACCESSOR: hasVertex
     def hasVertex(self, label):
-        # Set current to vertice list head
-        cur = self.vertices.head
-        found = False
-
-        # Iterate through vertice list and set found to true if label is found
-        while cur is not None and found is False:
-            vertex = cur.data
-            
-            if vertex._label == label:
-                found = True
-            
-            cur = cur.next
-        
-        return found
+        return self._vertexIndex.hasKey(label)
 
     # ACCESSOR getVertexCount
     # PURPOSE: Return size of vertice list
     def getVertexCount(self):
         return self.vertices.size
 
+    # ACCESSOR: getEdge
+    # PURPOSE: Return the road between two labels, or None if they aren't
+    # adjacent. Both ends share one edge object, so its _vertex1 and
+    # _vertex2 keep the order the road was added in, not the order of
+    # label1 and label2. Use getOther(getVertex(label1)) for the far end
     def getEdge(self, label1, label2):
         vertex1 = self.getVertex(label1)
         vertex2 = self.getVertex(label2)
@@ -143,42 +335,65 @@ class DSAGraph:
         if vertex1 is None or vertex2 is None:
             raise VertexNotFoundError("Vertices doesnt exist")
 
-        cur = self.edges.head
+        # Only the first vertex's own edges need to be searched
+        edgeNode = self._findEdgeNode(vertex1, vertex2)
         found = None
-        while cur is not None and found is None:
-            edge = cur.data
-            if (edge._vertex1 == vertex1 and edge._vertex2 == vertex2) or (edge._vertex1 == vertex2 and edge._vertex2 == vertex1):
-                found = edge
-            cur = cur.next
+
+        if edgeNode is not None:
+            found = edgeNode.data
 
         return found
 
     # ACCESSOR getEdgeCount
-    # PURPOSE: Return edge list size divided by 2 
-    # ( as edges are added twice due to reverse edges )
+    # PURPOSE: Return number of roads in the graph
     def getEdgeCount(self):
-        return self.edges.size // 2
+        return self._edgeCount
+
+    # ACCESSOR: _findEdgeNode
+    # PURPOSE: Return the node in vertex's edge list leading to neighbour,
+    # or None if the two aren't adjacent
+    def _findEdgeNode(self, vertex, neighbour):
+        cur = vertex._edges.head
+        found = None
+
+        while cur is not None and found is None:
+            if cur.data.getOther(vertex) is neighbour:
+                found = cur
+
+            cur = cur.next
+
+        return found
 
     # ACCESSOR: getVertex
     # PURPOSE: get the vertex object of a certain label
     def getVertex(self, label):
-        # Set current to vertice list head
-        cur = self.vertices.head 
+        # Look up the vertex list node in the label index
+        node = self._vertexIndex.lookup(label)
         found = None
 
-        # Iterate through vertices to find vertex with label input
-        while cur is not None and found is None:
-            vertex = cur.data
+        if node is not None:
+            found = node.data
 
-            if vertex._label == label:
-                found = vertex
-            
-            cur = cur.next
-        
         return found
+
+    # ACCESSOR: getVertexId
+    # PURPOSE: Return the integer id of a label, or None if it doesnt exist.
+    # Ids can change when other vertices are deleted
+    def getVertexId(self, label):
+        vertex = self.getVertex(label)
+        vertexId = None
+        if vertex is not None:
+            vertexId = vertex._id
+        return vertexId
+
+    # ACCESSOR: getLabel
+    def getLabel(self, vertexId):
+        if vertexId < 0 or vertexId >= self._nextId:
+            raise VertexNotFoundError("Vertex id " + str(vertexId) + " does not exist")
+        return self._vertexById[vertexId]._label
     
     # ACCCESSOR: getAdjacent
-    # PURPOSE: Return a sorted lsit of adjacent vertex to a certain vertex label
+    # PURPOSE: Return a sorted list of adjacent vertex to a certain vertex label
     def getAdjacent(self, label):
         # Get vertex of input label
         vertex = self.getVertex(label)
@@ -190,39 +405,14 @@ class DSAGraph:
         # Create list for adjacent vertexes
         adjacentList = DSALinkedList()
         
-        # Iterate through Edges to find those adjacent to label
-        cur = self.edges.head
+        # Edges are kept in neighbour order so the list comes out sorted
+        cur = vertex._edges.head
         
         while cur is not None:
-            edge = cur.data
-            
-            # If edges first vertex is input vertex, add second vertex to list
-            if edge._vertex1 == vertex:
-                adjacentList.insertLast(edge._vertex2)
-            
-            cur = cur.next
-        
-        # Create array for adjacent arrays to be sorted in, size of the amount
-        # adjacent
-        numAdjacent = adjacentList.size
-        labelArray = np.zeros(numAdjacent, dtype = object)
-        
-        # Place labels into the array
-        cur = adjacentList.head
-        for i in range(numAdjacent):        
-            labelArray[i] = cur.data._label
+            adjacentList.insertLast(cur.data.getOther(vertex))
             cur = cur.next
 
-        # Sort the Labels with selection Sort and place in linked list
-        sortedLabels = selectionSort(labelArray)
-        sortedAdjacentList = DSALinkedList()
-
-        # Place sorted labels into a new linked list
-        for i in range(numAdjacent):
-            adjVertex = self.getVertex(sortedLabels[i])
-            sortedAdjacentList.insertLast(adjVertex)
-
-        return sortedAdjacentList
+        return adjacentList
 
     # ACCESSOR: isAdjacent
     # PURPOSE: Determine if two input labels of vertices are adjacent
@@ -244,18 +434,9 @@ class DSAGraph:
             raise VertexNotFoundError("Vertex: " + label2 + " doesn't exist.")
 
 
-        # Iterate through edges and return true when vertices it is between 
-        # are equal to given labels
+        # Search the first vertex's edges for one leading to the second
         else: 
-            cur = self.edges.head
-            
-            while cur is not None:
-                edge = cur.data
-                
-                if edge._vertex1 == vertex1 and edge._vertex2 == vertex2:
-                    result = True
-                
-                cur = cur.next
+            result = self._findEdgeNode(vertex1, vertex2) is not None
         
         return result
 
@@ -303,15 +484,6 @@ class DSAGraph:
 
             print()
 
-    # MUTATOR: clearVisited
-    # PURPOSE: clear all vertices in list to univisted status
-    def clearVisited(self):
-        cur = self.vertices.head
-        while cur is not None:
-            vertex = cur.data
-            vertex._visited = False
-            cur = cur.next
-
     # ACCESSOR: getLowestLabel
     # PURPOSE: get the label of the lowest alphebetical vertex in list
     def getLowestLabel(self):
@@ -337,85 +509,149 @@ class DSAGraph:
         return lowest
 
     # ACCESSOR: breadthFirstSearch
-    # PURPOSE: Search through all entries of graph BFS
+    # PURPOSE: Print BFS traversal from the lowest label
     def breadthFirstSearch(self):
-        T = DSAQueue()
-        Q = DSAQueue()
-
-        # Clear the visited values
-        self.clearVisited()
-
         # Reference the starting vertex
         v = self.getLowestLabel()
         if v is None:
             raise VertexNotFoundError("No vertices in list to search")
-        v._visited = True
-        
-        Q.enqueue(v)
 
-        while not Q.isEmpty():
-            v = Q.dequeue()
-            adjacent = self.getAdjacent(v._label)
-            curAdj = adjacent.head
-            
-            while curAdj is not None:
-                w = curAdj.data
-                
-                # Enqueue v and w and set visited for adjacent that are unvisited
-                if not w._visited:
-                    T.enqueue(v)
-                    T.enqueue(w)
-                    w._visited = True
-                    Q.enqueue(w)
-                
-                curAdj = curAdj.next
-        
         # Print the traversal
         print("Breadth-First Traversal: ")
-        while not T.isEmpty():
-            v = T.dequeue()
-            w = T.dequeue()
-            print("(" + v._label + ", " + w._label + ")")
+        for parent, child in self._breadthFirst(v):
+            print("(" + parent._label + ", " + child._label + ")")
     
     # ACCESSOR: depthFirstSearch
-    # PURPOSE: Search through all entries of graph DFS
+    # PURPOSE: Print DFS traversal from the lowest label
     def depthFirstSearch(self):
-        T = DSAQueue()
-        S = DSAStack()
-
-        # Clear the visited values of vertices
-        self.clearVisited()
-
         # Reference starting vertex from vertice list
         v = self.getLowestLabel()
         if v is None:
             raise VertexNotFoundError("Graph has no vertices to search")
-        v._visited = True
-        
-        S.push(v)
-
-        while not S.isEmpty():
-            v = S.pop()
-            w = self.getUnvisitedAdjacent(v)
-            if w is not None:
-                T.enqueue(v)
-                T.enqueue(w)
-                w._visited = True
-                S.push(v)
-                S.push(w)
 
         # Print Traversal
         print("Depth-First Search Traversal: ")
-        while not T.isEmpty():
-            v = T.dequeue()
-            w = T.dequeue()
-            print("(" + v._label + ", " + w._label + ")")
+        for parent, child in self._depthFirst(v):
+            print("(" + parent._label + ", " + child._label + ")")
+
+    # ACCESSOR: breadthFirstTraversal
+    # PURPOSE: Generator of (parent, child) label pairs of the BFS tree,
+    # produced as the search runs. Starts from the lowest label unless a
+    # start label is given. maxDepth limits the number of roads from the
+    # start and maxDistance the road distance along the tree from it
+    def breadthFirstTraversal(self, start = None, maxDepth = None, maxDistance = None):
+        startVertex = self._getTraversalStart(start)
+        return ((parent._label, child._label) for parent, child in
+                self._breadthFirst(startVertex, maxDepth, maxDistance))
+
+    # ACCESSOR: depthFirstTraversal
+    # PURPOSE: Generator of (parent, child) label pairs of the DFS tree,
+    # with the same start and limits as breadthFirstTraversal
+    def depthFirstTraversal(self, start = None, maxDepth = None, maxDistance = None):
+        startVertex = self._getTraversalStart(start)
+        return ((parent._label, child._label) for parent, child in
+                self._depthFirst(startVertex, maxDepth, maxDistance))
+
+    # ACCESSOR: _getTraversalStart
+    # PURPOSE: Return start vertex for a traversal, checked before the
+    # generator is handed back so errors are raised straight away
+    def _getTraversalStart(self, start):
+        if start is None:
+            startVertex = self.getLowestLabel()
+            if startVertex is None:
+                raise VertexNotFoundError("Graph has no vertices to search")
+        else:
+            startVertex = self.getVertex(start)
+            if startVertex is None:
+                raise VertexNotFoundError("Location: " + start + " does not exist")
+
+        return startVertex
+
+    # ACCESSOR: _withinLimits
+    # PURPOSE: Check a depth and distance from the start against the
+    # optional traversal limits
+    def _withinLimits(self, depth, distance, maxDepth, maxDistance):
+        return ((maxDepth is None or depth <= maxDepth) and
+                (maxDistance is None or distance <= maxDistance))
+
+    # ACCESSOR: _breadthFirst
+    # PURPOSE: Breadth first search from a vertex, yielding the tree edges
+    # as vertex pairs. Neighbours past a limit are left unvisited so a
+    # shorter way to them found later can still be taken
+    def _breadthFirst(self, start, maxDepth = None, maxDistance = None):
+        Q = DSAQueue()
 
-    def is_path(self, source, destination):
+        # Depth and tree distance of each visited vertex for this search
+        # only, keyed by vertex id so the shared vertices are never written
+        # and a search limited to a few vertices only stores those
+        depth = {start._id: 0}
+        distance = {start._id: 0.0}
+
+        Q.enqueue(start)
+
+        while not Q.isEmpty():
+            v = Q.dequeue()
+            curEdge = v._edges.head
+
+            while curEdge is not None:
+                w = curEdge.data.getOther(v)
+                wDepth = depth[v._id] + 1
+                wDistance = distance[v._id] + curEdge.data._distance
+
+                # Visit and enqueue unvisited neighbours within the limits
+                if (w._id not in depth and
+                        self._withinLimits(wDepth, wDistance, maxDepth, maxDistance)):
+                    depth[w._id] = wDepth
+                    distance[w._id] = wDistance
+                    Q.enqueue(w)
+                    yield v, w
+
+                curEdge = curEdge.next
+
+    # ACCESSOR: _depthFirst
+    # PURPOSE: Depth first search from a vertex, yielding the tree edges as
+    # vertex pairs. Each stacked vertex keeps a cursor into its edge list,
+    # which is sorted by neighbour label, so a neighbour is looked at once
+    # and the search is O(V + E). Neighbours are visited in label order.
+    # Limits work as in _breadthFirst
+    def _depthFirst(self, start, maxDepth = None, maxDistance = None):
         S = DSAStack()
-        
-        pathFound = False
 
+        # Edge cursor, depth and tree distance of each visited vertex for
+        # this search only, by vertex id
+        cursor = {start._id: start._edges.head}
+        depth = {start._id: 0}
+        distance = {start._id: 0.0}
+
+        S.push(start)
+
+        while not S.isEmpty():
+            v = S.top()
+            curEdge = cursor[v._id]
+
+            # Skip over neighbours visited since v was last on top, or
+            # beyond the limits from here
+            while curEdge is not None and (curEdge.data.getOther(v)._id in depth or
+                    not self._withinLimits(depth[v._id] + 1,
+                        distance[v._id] + curEdge.data._distance,
+                        maxDepth, maxDistance)):
+                curEdge = curEdge.next
+
+            if curEdge is not None:
+                w = curEdge.data.getOther(v)
+                cursor[v._id] = curEdge.next
+                cursor[w._id] = w._edges.head
+                depth[w._id] = depth[v._id] + 1
+                distance[w._id] = distance[v._id] + curEdge.data._distance
+                S.push(w)
+                yield v, w
+            else:
+                S.pop()
+
+    # ACCESSOR: is_path
+    # PURPOSE: Determine if a route exists between two labels by comparing
+    # their component labels
+    def is_path(self, source, destination):
         sourceVertex = self.getVertex(source)
         destVertex = self.getVertex(destination)
         
@@ -426,133 +662,214 @@ class DSAGraph:
             raise VertexNotFoundError(source + "does not exist")
         elif destVertex is None:
             raise VertexNotFoundError(destination + "does not exist")
-        
 
-        # Clear the visited values of vertices
-        cur = self.vertices.head
-        while cur is not None:
-            vertex = cur.data
-            vertex._visited = False
-            cur = cur.next
+        return bool(self._componentOf[sourceVertex._id] ==
+                self._componentOf[destVertex._id])
 
-        # Reference starting vertex from vertice list
-        sourceVertex._visited = True
-        
-        S.push(sourceVertex)
+    # MUTATOR: _newComponent
+    # PURPOSE: Return an unused component label
+    def _newComponent(self):
+        if not self._freeComponents.isEmpty():
+            component = self._freeComponents.pop()
+        else:
+            component = self._nextComponent
+            self._nextComponent += 1
+        return component
+
+    # MUTATOR: _mergeComponents
+    # PURPOSE: Relabel the smaller of two vertices' components to the label
+    # of the larger, so each vertex is relabelled at most log V times as
+    # roads are added
+    def _mergeComponents(self, vertex1, vertex2):
+        keep = self._componentOf[vertex1._id]
+        lose = self._componentOf[vertex2._id]
+        start = vertex2
+
+        if self._componentSize[keep] < self._componentSize[lose]:
+            keep, lose = lose, keep
+            start = vertex1
+
+        # Walk the smaller component, the new label marks vertices done
+        self._componentOf[start._id] = keep
+        queue = DSALinkedList()
+        queue.insertLast(start)
+        cur = queue.head
 
-        while not S.isEmpty():
-            v = S.pop()
+        while cur is not None:
+            curEdge = cur.data._edges.head
+            while curEdge is not None:
+                neighbour = curEdge.data.getOther(cur.data)
+                if self._componentOf[neighbour._id] == lose:
+                    self._componentOf[neighbour._id] = keep
+                    queue.insertLast(neighbour)
+                curEdge = curEdge.next
+            cur = cur.next
 
-            if v._label == destination:
-                pathFound = True
+        self._componentSize[keep] += self._componentSize[lose]
+        self._componentSize[lose] = 0
+        self._freeComponents.push(lose)
+
+    # MUTATOR: _splitForest
+    # PURPOSE: Restore the components after a spanning forest road between
+    # two vertices has been removed. The two halves of the broken tree are
+    # walked in turn until the smaller one is fully found, then its roads
+    # are searched for a replacement that reconnects the halves. Only if
+    # there is none is the smaller half given a new label, so the cost
+    # follows the smaller side rather than the whole component
+    def _splitForest(self, vertex1, vertex2):
+        self._stampCount += 2
+        stamp1 = self._stampCount - 1
+        stamp2 = self._stampCount
+
+        side1 = DSALinkedList()
+        side1.insertLast(vertex1)
+        self._forestStamp[vertex1._id] = stamp1
+        cursor1 = side1.head
+
+        side2 = DSALinkedList()
+        side2.insertLast(vertex2)
+        self._forestStamp[vertex2._id] = stamp2
+        cursor2 = side2.head
+
+        while cursor1 is not None and cursor2 is not None:
+            cursor1 = self._expandForest(side1, cursor1, stamp1)
+            cursor2 = self._expandForest(side2, cursor2, stamp2)
+
+        if cursor1 is None:
+            small = side1
+            smallStamp = stamp1
+        else:
+            small = side2
+            smallStamp = stamp2
+
+        # Look for a road leaving the smaller half, it can only lead to the
+        # other half since roads never join different components
+        replaced = False
+        smallCount = 0
+        cur = small.head
+
+        while cur is not None and not replaced:
+            smallCount += 1
+            curEdge = cur.data._edges.head
+            while curEdge is not None and not replaced:
+                edge = curEdge.data
+                if (not edge._inForest and
+                        self._forestStamp[edge.getOther(cur.data)._id] != smallStamp):
+                    edge._inForest = True
+                    replaced = True
+                curEdge = curEdge.next
+            cur = cur.next
 
-            w = self.getUnvisitedAdjacent(v)
-            if w is not None:
-                w._visited = True
-                S.push(v)
-                S.push(w)
+        if not replaced:
+            oldComponent = self._componentOf[vertex1._id]
+            component = self._newComponent()
+            cur = small.head
+            while cur is not None:
+                self._componentOf[cur.data._id] = component
+                cur = cur.next
 
-        return pathFound
+            self._componentSize[component] = smallCount
+            self._componentSize[oldComponent] -= smallCount
 
-    def getUnvisitedAdjacent(self, vertex):
-        # Get list of adjacent vertex
-        adjacent = self.getAdjacent(vertex._label)
-       
-        # Iterate through adjacent and find next unvisited
-        curAdj = adjacent.head
+    # ACCESSOR: _expandForest
+    # PURPOSE: One breadth first step over forest roads, the side list is
+    # both the queue and the set found so far. Returns the next cursor,
+    # None once the side has been fully found
+    def _expandForest(self, side, cursor, stamp):
+        curEdge = cursor.data._edges.head
+        while curEdge is not None:
+            edge = curEdge.data
+            neighbour = edge.getOther(cursor.data)
+            if edge._inForest and self._forestStamp[neighbour._id] != stamp:
+                self._forestStamp[neighbour._id] = stamp
+                side.insertLast(neighbour)
+            curEdge = curEdge.next
+
+        return cursor.next
+
+    # ACCESSOR: getUnvisitedAdjacent
+    # PURPOSE: Return first neighbour by label whose id isnt in visited, a
+    # set or dict of vertex ids, or None if all have been visited
+    def getUnvisitedAdjacent(self, vertex, visited):
+        curEdge = vertex._edges.head
         unvisitedVertex = None
-        while curAdj is not None:
-            w = curAdj.data
-            if not w._visited and unvisitedVertex is None:
+        while curEdge is not None and unvisitedVertex is None:
+            w = curEdge.data.getOther(vertex)
+            if w._id not in visited:
                 unvisitedVertex = w
-            curAdj = curAdj.next
+            curEdge = curEdge.next
 
         return unvisitedVertex
-                
+
     def deleteVertex(self, label):
         vertex = self.getVertex(label)
-        vertexDeleted = False
 
         if vertex is None:
             raise VertexNotFoundError("Location: " + label + " does not exist")
 
-        # Iterate through Edges and delete those connected to the vertex
-        curEdge = self.edges.head
-        
-        while curEdge is not None:
-            nextEdge = curEdge.next
-            edge = curEdge.data
-            
-            # If current edge is connected to vertex
-            if edge._vertex1 == vertex or edge._vertex2 == vertex:
-                
-                # If edge to delete is first edge in list update head to next
-                if curEdge.prev is None:
-                    self.edges.head = curEdge.next
-                
-                    # If list is not empty set heads previous to none
-                    if self.edges.head:
-                        self.edges.head.prev = None
-                    # If list is empty update tail to be none
-                    else:
-                        self.edges.tail = None
-                
-                # If edge to delete is at middle or end of list
-                else:
-                    # Update previous edge to skip over cur edge
-                    curEdge.prev.next = curEdge.next
-
-                    # If deleting a middle node update next nodes previous
-                    if curEdge.next:
-                        curEdge.next.prev = curEdge.prev
-                    # If deleting the tail node update the tail pointer
-                    else:
-                        self.edges.tail = curEdge.prev
-
-                # Reduce edge list size upon deletion
-                self.edges.size -= 1
-                
-            curEdge = nextEdge
-
-        # Iterate through Vertex Linked List to delete Vertex
-        curVertex = self.vertices.head
-
-        while curVertex is not None:
-            nextVertex = curVertex.next
-            # See if current Vertex is vertex to delete
-            if curVertex.data == vertex and not vertexDeleted:
-                
-                # If vertex is the head of list update head
-                if curVertex.prev is None:
-                    self.vertices.head = curVertex.next
-                    # If vertex list is not now empty update prev
-                    if self.vertices.head:
-                        self.vertices.head.prev = None
-                    # If it is empty also update tail to none
-                    else:
-                        self.vertices.tail = None
-                # If vertex is middle or end of list update previous nodes next pointer
-                else:
-                    # update previous nodes next to skip over deleted
-                    curVertex.prev.next = curVertex.next
-                    
-                    # If deleting a middle node update previous of next
-                    if curVertex.next:
-                        curVertex.next.prev = curVertex.prev
-                    # If deleting the tail set tail to point to vertex
-                    else:
-                        self.vertices.tail = curVertex.prev
-
-                # Reduce vertex list size
-                self.vertices.size -= 1
-                vertexDeleted = True
-                
-                # Progress to next Vertice
-            curVertex = nextVertex
+        # Remove every road at this location from both its end vertices,
+        # splitting the component where needed. Ids are about to move, so
+        # the landmark table is out of date even with no roads
+        self._landmarksStale = True
+        while not vertex._edges.isEmpty():
+            edge = vertex._edges.head.data
+            neighbour = edge.getOther(vertex)
+            self._unlinkEdge(edge)
+            self._edgeCount -= 1
+            self._landmarksStale = True
+            if edge._inForest:
+                self._splitForest(vertex, neighbour)
+
+        # The vertex is now alone in its component, release the label
+        component = self._componentOf[vertex._id]
+        self._componentSize[component] = 0
+        self._freeComponents.push(component)
+
+        # Unlink the vertex list node and remove it from the label index
+        node = self._vertexIndex.search(label)
+        self.vertices.removeNode(node)
+        self._vertexIndex.delete(label)
+
+        # Keep ids dense by moving the highest id vertex into the gap
+        lastId = self._nextId - 1
+        if vertex._id != lastId:
+            moved = self._vertexById[lastId]
+            moved._id = vertex._id
+            self._vertexById[vertex._id] = moved
+            self._componentOf[vertex._id] = self._componentOf[lastId]
+            self._forestStamp[vertex._id] = self._forestStamp[lastId]
+
+        self._vertexById[lastId] = None
+        self._nextId -= 1
+        self._modCount += 1
+        if vertex._latitude is not None and vertex._longitude is not None:
+            self._numWithCoordinates -= 1
+
+    # MUTATOR: _unlinkEdge
+    # PURPOSE: Remove a road's node from the edge list of each end vertex
+    def _unlinkEdge(self, edge):
+        edge._vertex1._edges.removeNode(edge._node1)
+        edge._vertex2._edges.removeNode(edge._node2)
+        edge._node1 = None
+        edge._node2 = None
 
     #ACCESSOR: deleteEdge
-    #PURPOSE: delete the edge between input labels
+    #PURPOSE: delete the edge between input labels, reporting whether it
+    # existed. Returns True if a road was deleted
     def deleteEdge(self, label1, label2):
+        edgeDeleted = self.removeEdge(label1, label2)
+
+        if edgeDeleted:
+            print("Road Deleted\n")
+        else:
+            print("Road does not exist\n")
+
+        return edgeDeleted
+
+    # MUTATOR: removeEdge
+    # PURPOSE: deleteEdge without the report, returns True if a road was
+    # deleted and False if the locations werent adjacent
+    def removeEdge(self, label1, label2):
         # Get the two vertex objects of input labels
         vertex1 = self.getVertex(label1)
         vertex2 = self.getVertex(label2)
@@ -570,48 +887,919 @@ class DSAGraph:
             raise VertexNotFoundError("Vertex " + label2 + " does not exist")
 
 
-        # Iterate through edges of the graph
-        curEdge = self.edges.head
-        
-        while curEdge is not None:
-            nextEdge = curEdge.next
-            edge = curEdge.data
-            
+        # Find the edge in the first vertex's list, and if it exists remove
+        # it from both vertices' lists
+        edgeNode = self._findEdgeNode(vertex1, vertex2)
+
+        if edgeNode is not None:
+            self._unlinkEdge(edgeNode.data)
+            self._edgeCount -= 1
+            self._modCount += 1
+            self._landmarksStale = True
+            if edgeNode.data._inForest:
+                self._splitForest(vertex1, vertex2)
+            edgeDeleted = True
+
+        return edgeDeleted
+
+    # ACCESSOR: shortestPath
+    # PURPOSE: Dijkstra's algorithm over road distances, return a DSARoute
+    # for the shortest route between two labels or None if there is none
+    def shortestPath(self, source, destination):
+        sourceVertex, destVertex = self._getRouteEnds(source, destination)
+        return self._bestFirstSearch(sourceVertex, destVertex, None)
+
+    # ACCESSOR: shortestPathAStar
+    # PURPOSE: A* search guided by straight line distance to the destination.
+    # Runs as Dijkstra unless every location has coordinates: an estimate of
+    # 0 at some locations next to real estimates at their neighbours breaks
+    # the triangle inequality, and a settled location is never reopened.
+    # Road distances must be in kilometres and no shorter than the straight
+    # line for the route to be the shortest
+    def shortestPathAStar(self, source, destination):
+        sourceVertex, destVertex = self._getRouteEnds(source, destination)
+
+        heuristic = None
+        if self._numWithCoordinates == self._nextId:
+            heuristic = self._straightLineHeuristic(destVertex)
+
+        return self._bestFirstSearch(sourceVertex, destVertex, heuristic)
+
+    # ACCESSOR: _straightLineHeuristic
+    # PURPOSE: Return function giving straight line kilometres from a vertex
+    # id to the destination, a lower bound on the road distance
+    def _straightLineHeuristic(self, destVertex):
+        def heuristic(vId):
+            vertex = self._vertexById[vId]
+            return haversineDistance(vertex._latitude, vertex._longitude,
+                    destVertex._latitude, destVertex._longitude)
+
+        return heuristic
+
+    # ACCESSOR: _bestFirstSearch
+    # PURPOSE: Dijkstra's algorithm, or A* when a heuristic function of vertex
+    # id is given. Heuristic must never overestimate the remaining distance
+    # and obey the triangle inequality. Returns a DSARoute or None
+    def _bestFirstSearch(self, sourceVertex, destVertex, heuristic):
+        found, dist, prevEdge, numSettled = self._searchFrom(sourceVertex,
+                destVertex._id, heuristic)
+
+        route = None
+        if found:
+            route = self._buildRoute(destVertex, prevEdge, int(dist[destVertex._id]),
+                    numSettled)
+
+        return route
+
+    # ACCESSOR: _searchFrom
+    # PURPOSE: Run the search from source until destId is settled, or over
+    # the whole network when destId is -1. Returns whether destId was found,
+    # the distance and previous edge arrays and the number of vertices settled
+    def _searchFrom(self, sourceVertex, destId, heuristic):
+        # Per query arrays indexed by vertex id
+        numIds = self._nextId
+        dist = np.full(numIds, np.inf)
+        estimate = np.zeros(numIds)
+        prevEdge = np.empty(numIds, dtype = object)
+        settled = np.zeros(numIds, dtype = bool)
+        numSettled = 0
+
+        # Indexed heap holds each vertex at most once, lowering its
+        # priority in place when a shorter road to it is found
+        heap = DSAIndexedHeap(numIds)
+        dist[sourceVertex._id] = 0
+        heap.add(sourceVertex._id, 0)
+        found = False
 
-            # Check if cur is between label1 and label2
-            if (edge._vertex1 == vertex1 and edge._vertex2 == vertex2) or (edge._vertex1 
-                    == vertex2 and edge._vertex2 == vertex1):
-                # If edge is first in the list update head to point to next
-                if curEdge.prev is None:
-                    self.edges.head = curEdge.next
-                    
-                    # If list isnt empty update new heads prev to none
-                    if self.edges.head:
-                        self.edges.head.prev = None
-
-                    # If list is empty update the tail to none
-                    else:
-                        self.edges.tail = None
-
-                # If edge is in the middle or end of list set previous edge
-                # to to cur edge next
+        while not heap.isEmpty() and not found:
+            vId = heap.remove()
+            settled[vId] = True
+            numSettled += 1
+
+            if vId == destId:
+                found = True
+            else:
+                # Relax every road leaving the settled vertex
+                vertex = self._vertexById[vId]
+                cur = vertex._edges.head
+                while cur is not None:
+                    edge = cur.data
+                    wId = edge.getOther(vertex)._id
+                    newDist = dist[vId] + edge._distance
+
+                    if not settled[wId] and newDist < dist[wId]:
+                        # Estimate is worked out once, when first reached
+                        if heuristic is not None and dist[wId] == np.inf:
+                            estimate[wId] = heuristic(wId)
+
+                        dist[wId] = newDist
+                        prevEdge[wId] = edge
+                        if heap.contains(wId):
+                            heap.decreaseKey(wId, newDist + estimate[wId])
+                        else:
+                            heap.add(wId, newDist + estimate[wId])
+
+                    cur = cur.next
+
+        return found, dist, prevEdge, numSettled
+
+    # ACCESSOR: shortestPathALT
+    # PURPOSE: A* search using landmark distances (ALT) for its estimate,
+    # needs no coordinates. Landmarks are built on first use and again
+    # after roads change
+    def shortestPathALT(self, source, destination):
+        sourceVertex, destVertex = self._getRouteEnds(source, destination)
+
+        if self._landmarkDist is None or self._landmarksStale:
+            self.buildLandmarks(self._numLandmarks)
+
+        heuristic = None
+        if destVertex._id < self._landmarkDist.shape[1]:
+            heuristic = self._landmarkHeuristic(destVertex)
+
+        return self._bestFirstSearch(sourceVertex, destVertex, heuristic)
+
+    # ACCESSOR: hasLandmarks
+    # PURPOSE: True when a landmark table is built and no road has changed
+    # since, so ALT can use it without a rebuild
+    def hasLandmarks(self):
+        return self._landmarkDist is not None and not self._landmarksStale
+
+    # ACCESSOR: _landmarkHeuristic
+    # PURPOSE: Return function giving the triangle inequality lower bound
+    # max over landmarks L of |d(L, dest) - d(L, v)| for a vertex id v
+    def _landmarkHeuristic(self, destVertex):
+        destDist = self._landmarkDist[:, destVertex._id]
+        landmarkDist = self._landmarkDist
+
+        def heuristic(vId):
+            bound = 0.0
+            # Vertices added since the landmarks were built have no column
+            if vId < landmarkDist.shape[1]:
+                with np.errstate(invalid = "ignore"):
+                    diff = np.abs(landmarkDist[:, vId] - destDist)
+                # Landmarks reaching neither vertex give no bound
+                diff[np.isnan(diff)] = 0.0
+                bound = diff.max()
+            return bound
+
+        return heuristic
+
+    # MUTATOR: buildLandmarks
+    # PURPOSE: Pick landmarks spread far apart and store the road distance
+    # from each landmark to every vertex, one row per landmark
+    def buildLandmarks(self, numLandmarks = 8):
+        # Remember count asked for so rebuilds use it as the network grows
+        self._numLandmarks = numLandmarks
+        numIds = self._nextId
+        numLandmarks = min(numLandmarks, self.getVertexCount())
+        landmarkIds = np.empty(numLandmarks, dtype = np.int64)
+        landmarkDist = np.full((numLandmarks, numIds), np.inf)
+
+        # First landmark is the vertex furthest from an arbitrary start, each
+        # next one is furthest from all landmarks picked so far. Unreachable
+        # vertices count as furthest so every part of the network gets one
+        if numLandmarks > 0:
+            found, nearest, prevEdge, numSettled = self._searchFrom(
+                    self.vertices.head.data, -1, None)
+
+        for i in range(numLandmarks):
+            score = np.where(np.isinf(nearest), np.finfo(np.float64).max, nearest)
+            landmarkIds[i] = np.argmax(score)
+
+            found, dist, prevEdge, numSettled = self._searchFrom(
+                    self._vertexById[landmarkIds[i]], -1, None)
+            landmarkDist[i] = dist
+            if i == 0:
+                nearest = dist
+            else:
+                nearest = np.minimum(nearest, dist)
+
+        self._landmarkIds = landmarkIds
+        self._landmarkDist = landmarkDist
+        self._landmarksStale = False
+
+    # ACCESSOR: saveLandmarks
+    # PURPOSE: Save landmark distance table to a numpy .npz file, columns are
+    # saved by label so ids don't need to match when loaded
+    def saveLandmarks(self, filename):
+        if self._landmarkDist is None or self._landmarksStale:
+            self.buildLandmarks(self._numLandmarks)
+
+        # Label of each column, so loading can map it to that label's id
+        numIds = self._landmarkDist.shape[1]
+        columnLabels = np.empty(numIds, dtype = object)
+        for i in range(numIds):
+            columnLabels[i] = self._vertexById[i]._label
+
+        with open(filename, "wb") as f:
+            np.savez(f, columnLabels = columnLabels.astype(str),
+                    landmarkIds = self._landmarkIds,
+                    landmarkDist = self._landmarkDist,
+                    signature = np.array([self._networkSignature()], dtype = np.uint64))
+
+    # MUTATOR: loadLandmarks
+    # PURPOSE: Load landmark table saved by saveLandmarks. Returns False
+    # without loading if the file was saved from a different network
+    def loadLandmarks(self, filename):
+        with np.load(filename) as data:
+            columnLabels = data["columnLabels"]
+            savedIds = data["landmarkIds"]
+            savedDist = data["landmarkDist"]
+            signature = int(data["signature"][0])
+
+        loaded = signature == self._networkSignature()
+        if loaded:
+            # Move each saved column to the id its label has now
+            numLandmarks = len(savedIds)
+            landmarkIds = np.empty(numLandmarks, dtype = np.int64)
+            landmarkDist = np.full((numLandmarks, self._nextId), np.inf)
+            for i in range(len(columnLabels)):
+                vertex = self.getVertex(str(columnLabels[i]))
+                if columnLabels[i] != "" and vertex is not None:
+                    landmarkDist[:, vertex._id] = savedDist[:, i]
+            for i in range(numLandmarks):
+                landmarkIds[i] = self.getVertex(str(columnLabels[savedIds[i]]))._id
+
+            self._landmarkIds = landmarkIds
+            self._landmarkDist = landmarkDist
+            self._numLandmarks = numLandmarks
+            self._landmarksStale = False
+
+        return loaded
+
+    # ACCESSOR: _networkSignature
+    # PURPOSE: Checksum of every location and road, independent of order, to
+    # tell whether saved landmark tables belong to this network
+    def _networkSignature(self):
+        total = 0
+        cur = self.vertices.head
+        while cur is not None:
+            vertex = cur.data
+            total += zlib.crc32(str(vertex._label).encode())
+            curEdge = vertex._edges.head
+            while curEdge is not None:
+                edge = curEdge.data
+                # Each road is counted once, from its lower label end
+                other = edge.getOther(vertex)
+                if vertex._label < other._label:
+                    total += zlib.crc32((str(vertex._label) + "\0" +
+                            str(other._label) + "\0" +
+                            str(edge._distance)).encode()) << 32
+                curEdge = curEdge.next
+            cur = cur.next
+
+        return total % (2 ** 64)
+
+    # ACCESSOR: shortestPathBidirectional
+    # PURPOSE: Dijkstra's algorithm run from both ends at once, meeting in
+    # the middle. Returns same route distance as shortestPath but settles
+    # far fewer vertices on large networks, None if there is no route
+    def shortestPathBidirectional(self, source, destination):
+        sourceVertex, destVertex = self._getRouteEnds(source, destination)
+
+        # Per query arrays for the forward (from source) and backward
+        # (from destination) searches
+        numIds = self._nextId
+        distF = np.full(numIds, np.inf)
+        distB = np.full(numIds, np.inf)
+        prevF = np.empty(numIds, dtype = object)
+        prevB = np.empty(numIds, dtype = object)
+        settledF = np.zeros(numIds, dtype = bool)
+        settledB = np.zeros(numIds, dtype = bool)
+        heapF = DSAIndexedHeap(numIds)
+        heapB = DSAIndexedHeap(numIds)
+
+        distF[sourceVertex._id] = 0
+        heapF.add(sourceVertex._id, 0)
+        distB[destVertex._id] = 0
+        heapB.add(destVertex._id, 0)
+
+        # Shortest route seen so far, joined by bestEdge which leads from
+        # bestVertex, settled by one search, to a vertex reached by the other
+        best = np.inf
+        bestEdge = None
+        bestVertex = None
+        bestForward = True
+        numSettled = 0
+        searching = sourceVertex is not destVertex
+
+        while searching and not heapF.isEmpty() and not heapB.isEmpty():
+            topF = heapF.getPriority(heapF.peek())
+            topB = heapB.getPriority(heapB.peek())
+
+            # Neither frontier can lead to anything shorter than best
+            if topF + topB >= best:
+                searching = False
+
+            # Grow whichever search has the closer frontier
+            elif topF <= topB:
+                newBest, newEdge, newVertex = self._settleNext(heapF, distF, prevF,
+                        settledF, distB, best)
+                if newEdge is not None:
+                    best, bestEdge, bestVertex = newBest, newEdge, newVertex
+                    bestForward = True
+                numSettled += 1
+            else:
+                newBest, newEdge, newVertex = self._settleNext(heapB, distB, prevB,
+                        settledB, distF, best)
+                if newEdge is not None:
+                    best, bestEdge, bestVertex = newBest, newEdge, newVertex
+                    bestForward = False
+                numSettled += 1
+
+        route = None
+        if sourceVertex is destVertex:
+            route = self._buildRoute(destVertex, prevF, 0, 0)
+
+        elif bestEdge is not None:
+            # Split the joining road into its forward and backward ends
+            if bestForward:
+                fwdVertex = bestVertex
+                bwdVertex = bestEdge.getOther(bestVertex)
+            else:
+                fwdVertex = bestEdge.getOther(bestVertex)
+                bwdVertex = bestVertex
+
+            route = self._buildRoute(fwdVertex, prevF, int(best), numSettled)
+            locations = route.getLocations()
+            roads = route.getRoads()
+            roads.insertLast(bestEdge)
+
+            # Walk the backward search tree from the meeting vertex on to
+            # the destination, appending as we go
+            vertex = bwdVertex
+            locations.insertLast(vertex._label)
+            edge = prevB[vertex._id]
+            while edge is not None:
+                roads.insertLast(edge)
+                vertex = edge.getOther(vertex)
+                locations.insertLast(vertex._label)
+                edge = prevB[vertex._id]
+
+        return route
+
+    # MUTATOR: _settleNext
+    # PURPOSE: Settle closest vertex of one side of a bidirectional search
+    # and relax its roads. Returns the shorter route length, the joining
+    # road and the settled vertex if a road into the other search beats
+    # best, otherwise (best, None, None)
+    def _settleNext(self, heap, dist, prevEdge, settled, otherDist, best):
+        bestEdge = None
+        bestVertex = None
+        vId = heap.remove()
+        settled[vId] = True
+
+        vertex = self._vertexById[vId]
+        cur = vertex._edges.head
+        while cur is not None:
+            edge = cur.data
+            wId = edge.getOther(vertex)._id
+            newDist = dist[vId] + edge._distance
+
+            if not settled[wId] and newDist < dist[wId]:
+                dist[wId] = newDist
+                prevEdge[wId] = edge
+                if heap.contains(wId):
+                    heap.decreaseKey(wId, newDist)
                 else:
-                    curEdge.prev.next = curEdge.next
-                    
-                    # If not the tail update prev to skip over edge to delete
-                    if curEdge.next:
-                        curEdge.next.prev = curEdge.prev
-                    # if deleting tail update tail to be previous node
-                    else:
-                        self.edges.tail = curEdge.prev
-
-                # Reduce edge list size
-                self.edges.size -= 1
-                edgeDeleted = True
-           
-            curEdge = nextEdge
+                    heap.add(wId, newDist)
 
-        if edgeDeleted:
-            print("Road Deleted\n")
+            # Road reaches a vertex the other search has labelled
+            if newDist + otherDist[wId] < best:
+                best = newDist + otherDist[wId]
+                bestEdge = edge
+                bestVertex = vertex
+
+            cur = cur.next
+
+        return best, bestEdge, bestVertex
+
+    # ACCESSOR: _getRouteEnds
+    # PURPOSE: Return source and destination vertices of a route query,
+    # raising error if either doesnt exist
+    def _getRouteEnds(self, source, destination):
+        sourceVertex = self.getVertex(source)
+        destVertex = self.getVertex(destination)
+
+        if sourceVertex is None and destVertex is None:
+            raise VertexNotFoundError(source + " does not exist and " +
+                    destination + " does not exist")
+        elif sourceVertex is None:
+            raise VertexNotFoundError(source + " does not exist")
+        elif destVertex is None:
+            raise VertexNotFoundError(destination + " does not exist")
+
+        return sourceVertex, destVertex
+
+    # ACCESSOR: _buildRoute
+    # PURPOSE: Walk back from destination through the edge used to reach each
+    # vertex, building the route in travel order
+    def _buildRoute(self, destVertex, prevEdge, distance, settled):
+        locations = DSALinkedList()
+        roads = DSALinkedList()
+
+        vertex = destVertex
+        locations.insertFirst(vertex._label)
+        edge = prevEdge[vertex._id]
+        while edge is not None:
+            roads.insertFirst(edge)
+            vertex = edge.getOther(vertex)
+            locations.insertFirst(vertex._label)
+            edge = prevEdge[vertex._id]
+
+        return DSARoute(distance, locations, roads, settled)
+
+    # ACCESSOR: freeze
+    # PURPOSE: Return an immutable compressed sparse row snapshot of the graph
+    def freeze(self):
+        numVertex = self.getVertexCount()
+
+        # Place vertices in an array and order them by label, a vertex's
+        # position in the sorted array becomes its id
+        vertexArray = np.empty(numVertex, dtype = object)
+        labelArray = np.empty(numVertex, dtype = object)
+        cur = self.vertices.head
+        for i in range(numVertex):
+            vertexArray[i] = cur.data
+            labelArray[i] = cur.data._label
+            cur = cur.next
+
+        order = np.argsort(labelArray, kind = "stable")
+        vertexArray = vertexArray[order]
+        labelArray = labelArray[order]
+
+        # Snapshot id of each graph id, so neighbours map across without
+        # looking up labels
+        labelIndex = DSAHashTable(numVertex * 2)
+        frozenId = np.empty(self._nextId, dtype = np.int64)
+        for i in range(numVertex):
+            labelIndex.insert(labelArray[i], i)
+            frozenId[vertexArray[i]._id] = i
+
+        # Component labels carry over so path checks need no search
+        components = self._componentOf[:self._nextId][
+                np.array([v._id for v in vertexArray], dtype = np.int64)]
+
+        # Row pointers from the degree of each vertex
+        indptr = np.zeros(numVertex + 1, dtype = np.int64)
+        for i in range(numVertex):
+            indptr[i + 1] = indptr[i] + vertexArray[i]._edges.size
+
+        numEntries = int(indptr[numVertex])
+        indices = np.empty(numEntries, dtype = np.int32)
+        weights = np.empty(numEntries, dtype = np.int64)
+        roadIds = np.empty(numEntries, dtype = np.int32)
+
+        # Edge lists are in label order, so each row of indices is sorted
+        pos = 0
+        for i in range(numVertex):
+            cur = vertexArray[i]._edges.head
+            while cur is not None:
+                edge = cur.data
+                indices[pos] = frozenId[edge.getOther(vertexArray[i])._id]
+                weights[pos] = edge._distance
+                roadIds[pos] = edge._roadId
+                pos += 1
+                cur = cur.next
+
+        # Road ids are shared with the graph's name table
+        roadNames = self._roadNames[:self._numRoadNames].copy()
+
+        # Coordinates by snapshot id, NaN where not known
+        latitudes = np.full(numVertex, np.nan)
+        longitudes = np.full(numVertex, np.nan)
+        for i in range(numVertex):
+            if vertexArray[i]._latitude is not None:
+                latitudes[i] = vertexArray[i]._latitude
+            if vertexArray[i]._longitude is not None:
+                longitudes[i] = vertexArray[i]._longitude
+
+        # Current landmark table carries over by snapshot id, NaN for
+        # locations added since it was built
+        landmarkIds = None
+        landmarkDist = None
+        if self.hasLandmarks():
+            numColumns = self._landmarkDist.shape[1]
+            landmarkIds = frozenId[self._landmarkIds]
+            landmarkDist = np.full((len(landmarkIds), numVertex), np.nan)
+            for i in range(numVertex):
+                if vertexArray[i]._id < numColumns:
+                    landmarkDist[:, i] = self._landmarkDist[:, vertexArray[i]._id]
+
+        return DSAFrozenGraph(labelArray, labelIndex, indptr, indices, weights,
+                roadIds, roadNames, latitudes, longitudes, components,
+                landmarkIds, landmarkDist)
+
+# Read only snapshot of a DSAGraph. Vertex ids are positions in label order,
+# neighbours of vertex i are indices[indptr[i]:indptr[i + 1]] in increasing
+# id (so alphabetical) order, with matching entries in weights and roadIds.
+# The arrays can be memory mapped from a snapshot file, in which case there
+# is no label index and labels are found by binary search of the sorted
+# labels array instead.
+class DSAFrozenGraph:
+
+    # CONSTRUCTOR
+    def __init__(self, labels, labelIndex, indptr, indices, weights, roadIds,
+            roadNames, latitudes = None, longitudes = None, components = None,
+            landmarkIds = None, landmarkDist = None):
+        self.labels = labels
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        self.roadIds = roadIds
+        self.roadNames = roadNames
+        self.latitudes = latitudes
+        self.longitudes = longitudes
+        self._labelIndex = labelIndex
+        # Connected component label of each id, two locations have a path
+        # between them when their labels match. Worked out on the first path
+        # check when not given
+        self.components = components
+        # Landmark table for ALT routing, a row of road distances by id for
+        # each landmark. NaN where a distance isnt known
+        self.landmarkIds = landmarkIds
+        self.landmarkDist = landmarkDist
+
+        # Snapshot arrays are never written after construction
+        for array in (labels, indptr, indices, weights, roadIds, roadNames,
+                latitudes, longitudes, components, landmarkIds, landmarkDist):
+            if array is not None:
+                array.flags.writeable = False
+
+    # ACCESSOR: getVertexCount
+    def getVertexCount(self):
+        return len(self.labels)
+
+    # ACCESSOR: getEdgeCount
+    # PURPOSE: Return number of roads, each road is held in both its rows
+    def getEdgeCount(self):
+        return len(self.indices) // 2
+
+    # ACCESSOR: hasVertex
+    def hasVertex(self, label):
+        return self.getVertexId(label) is not None
+
+    # ACCESSOR: getVertexId
+    # PURPOSE: Return the integer id of a label, or None if it doesnt exist
+    def getVertexId(self, label):
+        if self._labelIndex is not None:
+            vertexId = self._labelIndex.lookup(label)
         else:
-            print("Road does not exist\n")
+            vertexId = int(np.searchsorted(self.labels, label))
+            if vertexId >= len(self.labels) or self.labels[vertexId] != label:
+                vertexId = None
+        return vertexId
+
+    # ACCESSOR: getLabel
+    def getLabel(self, vertexId):
+        return str(self.labels[vertexId])
+
+    # ACCESSOR: _requireId
+    # PURPOSE: Return id of label, raising error if it doesnt exist
+    def _requireId(self, label):
+        vertexId = self.getVertexId(label)
+        if vertexId is None:
+            raise VertexNotFoundError("Vertex " + str(label) + " does not exist")
+        return vertexId
+
+    # ACCESSOR: thaw
+    # PURPOSE: Return a new DSAGraph with the same locations and roads
+    def thaw(self):
+        numVertex = self.getVertexCount()
+        network = DSAGraph()
+        network.reserve(numVertex)
+
+        for i in range(numVertex):
+            latitude = None
+            longitude = None
+            if self.latitudes is not None and not np.isnan(self.latitudes[i]):
+                latitude = float(self.latitudes[i])
+            if self.longitudes is not None and not np.isnan(self.longitudes[i]):
+                longitude = float(self.longitudes[i])
+            network.addVertex(str(self.labels[i]), latitude, longitude)
+
+        # Each road is in both its rows, add it from the lower id end
+        for i in range(numVertex):
+            for pos in range(self.indptr[i], self.indptr[i + 1]):
+                j = self.indices[pos]
+                if j > i:
+                    network.addEdge(str(self.labels[i]), str(self.labels[j]),
+                            str(self.roadNames[self.roadIds[pos]]),
+                            int(self.weights[pos]))
+
+        # Ids were given in snapshot id order, so the landmark table fits
+        # the new graph as it is
+        if self.landmarkIds is not None:
+            network._landmarkIds = np.array(self.landmarkIds)
+            network._landmarkDist = np.array(self.landmarkDist)
+            network._numLandmarks = len(self.landmarkIds)
+            network._landmarksStale = False
+
+        return network
+
+    # ACCESSOR: getAdjacent
+    # PURPOSE: Return array of neighbour labels in alphabetical order
+    def getAdjacent(self, label):
+        vertexId = self._requireId(label)
+        return self.labels[self.indices[self.indptr[vertexId]:self.indptr[vertexId + 1]]]
+
+    # ACCESSOR: _findEntry
+    # PURPOSE: Binary search row of id1 for id2, return entry position or -1
+    def _findEntry(self, id1, id2):
+        start = self.indptr[id1]
+        end = self.indptr[id1 + 1]
+        pos = start + np.searchsorted(self.indices[start:end], id2)
+        if pos >= end or self.indices[pos] != id2:
+            pos = -1
+        return pos
+
+    # ACCESSOR: isAdjacent
+    def isAdjacent(self, label1, label2):
+        return self._findEntry(self._requireId(label1), self._requireId(label2)) != -1
+
+    # ACCESSOR: getEdge
+    # PURPOSE: Return (road name, distance) between two labels, or None
+    def getEdge(self, label1, label2):
+        pos = self._findEntry(self._requireId(label1), self._requireId(label2))
+        edge = None
+        if pos != -1:
+            edge = (str(self.roadNames[self.roadIds[pos]]), int(self.weights[pos]))
+        return edge
+
+    # ACCESSOR: hopDistances
+    # PURPOSE: Level by level BFS from a label to every location, returning
+    # an array of road counts from the start and an array of BFS tree
+    # parents, both indexed by id. Unreachable ids get -1 in both, as does
+    # the start's parent. Each level is expanded with whole array
+    # operations on the CSR rows instead of one step per neighbour. Where a
+    # location could have several parents on the level above, the lowest
+    # id (first label) is taken
+    def hopDistances(self, start):
+        startId = self._requireId(start)
+        numVertex = self.getVertexCount()
+        hops = np.full(numVertex, -1, dtype = np.int64)
+        parents = np.full(numVertex, -1, dtype = np.int64)
+
+        hops[startId] = 0
+        frontier = np.array([startId], dtype = np.int64)
+        level = 0
+
+        while len(frontier) > 0:
+            positions, rowLengths = self._rowEntries(frontier)
+            sources = np.repeat(frontier, rowLengths)
+            targets = self.indices[positions]
+
+            # Keep the first entry reaching each unvisited id
+            unseen = hops[targets] == -1
+            targets, first = np.unique(targets[unseen], return_index = True)
+            level += 1
+            hops[targets] = level
+            parents[targets] = sources[unseen][first]
+            frontier = targets
+
+        return hops, parents
+
+    # ACCESSOR: _rowEntries
+    # PURPOSE: Return the position of every entry in the rows of an array of
+    # ids, in row order, and the length of each row
+    def _rowEntries(self, ids):
+        rowStarts = self.indptr[ids]
+        rowLengths = self.indptr[ids + 1] - rowStarts
+        rowOffsets = np.repeat(np.cumsum(rowLengths) - rowLengths, rowLengths)
+        positions = (np.repeat(rowStarts, rowLengths) +
+                np.arange(len(rowOffsets)) - rowOffsets)
+        return positions, rowLengths
+
+    # ACCESSOR: _labelComponents
+    # PURPOSE: Return component label of every id, from a level by level
+    # BFS of whole array operations out of each id not yet labelled
+    def _labelComponents(self):
+        numVertex = self.getVertexCount()
+        components = np.full(numVertex, -1, dtype = np.int64)
+        numComponents = 0
+        start = 0
+
+        while start < numVertex:
+            if components[start] == -1:
+                components[start] = numComponents
+                frontier = np.array([start], dtype = np.int64)
+                while len(frontier) > 0:
+                    positions, rowLengths = self._rowEntries(frontier)
+                    targets = self.indices[positions]
+                    frontier = np.unique(targets[components[targets] == -1]).astype(np.int64)
+                    components[frontier] = numComponents
+                numComponents += 1
+            start += 1
+
+        components.flags.writeable = False
+        return components
+
+    # ACCESSOR: _breadthFirst
+    # PURPOSE: BFS from start id, return tree edge parent and child arrays
+    # and the number of tree edges
+    def _breadthFirst(self, start):
+        numVertex = self.getVertexCount()
+        visited = np.zeros(numVertex, dtype = bool)
+        queue = np.empty(numVertex, dtype = np.int64)
+        parents = np.empty(numVertex, dtype = np.int64)
+        children = np.empty(numVertex, dtype = np.int64)
+        numTree = 0
+
+        visited[start] = True
+        queue[0] = start
+        qHead = 0
+        qTail = 1
+
+        while qHead < qTail:
+            v = queue[qHead]
+            qHead += 1
+            pos = self.indptr[v]
+            end = self.indptr[v + 1]
+            while pos < end:
+                w = self.indices[pos]
+                if not visited[w]:
+                    visited[w] = True
+                    parents[numTree] = v
+                    children[numTree] = w
+                    numTree += 1
+                    queue[qTail] = w
+                    qTail += 1
+                pos += 1
+
+        return parents, children, numTree
+
+    # ACCESSOR: _depthFirst
+    # PURPOSE: DFS from start id resuming each stacked vertex's position in
+    # its row, return tree edge parent and child arrays and their count
+    def _depthFirst(self, start):
+        numVertex = self.getVertexCount()
+        visited = np.zeros(numVertex, dtype = bool)
+        stack = np.empty(numVertex, dtype = np.int64)
+        cursor = self.indptr[:-1].copy()
+        parents = np.empty(numVertex, dtype = np.int64)
+        children = np.empty(numVertex, dtype = np.int64)
+        numTree = 0
+
+        visited[start] = True
+        stack[0] = start
+        top = 1
+
+        while top > 0:
+            v = stack[top - 1]
+            end = self.indptr[v + 1]
+            # Skip over neighbours visited since v was last on top
+            while cursor[v] < end and visited[self.indices[cursor[v]]]:
+                cursor[v] += 1
+
+            if cursor[v] < end:
+                w = self.indices[cursor[v]]
+                visited[w] = True
+                parents[numTree] = v
+                children[numTree] = w
+                numTree += 1
+                stack[top] = w
+                top += 1
+            else:
+                top -= 1
+
+        return parents, children, numTree
+
+    # ACCESSOR: breadthFirstSearch
+    # PURPOSE: Print BFS from lowest label, same output as DSAGraph
+    def breadthFirstSearch(self):
+        if self.getVertexCount() == 0:
+            raise VertexNotFoundError("No vertices in list to search")
+
+        parents, children, numTree = self._breadthFirst(0)
+        print("Breadth-First Traversal: ")
+        for i in range(numTree):
+            print("(" + self.labels[parents[i]] + ", " + self.labels[children[i]] + ")")
+
+    # ACCESSOR: depthFirstSearch
+    # PURPOSE: Print DFS from lowest label, same output as DSAGraph
+    def depthFirstSearch(self):
+        if self.getVertexCount() == 0:
+            raise VertexNotFoundError("Graph has no vertices to search")
+
+        parents, children, numTree = self._depthFirst(0)
+        print("Depth-First Search Traversal: ")
+        for i in range(numTree):
+            print("(" + self.labels[parents[i]] + ", " + self.labels[children[i]] + ")")
+
+    # ACCESSOR: is_path
+    # PURPOSE: Determine if a route exists between two labels by comparing
+    # their component labels
+    def is_path(self, source, destination):
+        sourceId = self._requireId(source)
+        destId = self._requireId(destination)
+
+        if self.components is None:
+            self.components = self._labelComponents()
+        return bool(self.components[sourceId] == self.components[destId])
+
+    # ACCESSOR: displayAsList
+    # PURPOSE: Display graph as an adjacency list, same output as DSAGraph.
+    # Ids are already in label order and each row in neighbour label order
+    def displayAsList(self):
+        print("\nList of Locations and there neighboring places:\n")
+
+        for i in range(self.getVertexCount()):
+            print("Location " + str(i + 1) + "\n" + str(self.labels[i]) + ":")
+
+            start = self.indptr[i]
+            end = self.indptr[i + 1]
+            for pos in range(start, end):
+                print("  Adjacent City: " + str(self.labels[self.indices[pos]]) +
+                        "\n    Connecting Road: " +
+                            str(self.roadNames[self.roadIds[pos]]) + "\n    Distance: " +
+                            str(int(self.weights[pos])) + "\n")
+
+            if start == end:
+                print("No adjacent Towns")
+
+            print()
+
+    # ACCESSOR: shortestPath
+    # PURPOSE: Dijkstra's algorithm over the rows, return a DSARoute for the
+    # shortest route between two labels or None if there is none. There are
+    # no vertex objects, so each road of the route is an edge holding only
+    # its name and distance
+    def shortestPath(self, source, destination):
+        return self._searchRoute(self._requireId(source),
+                self._requireId(destination), False)
+
+    # ACCESSOR: shortestPathALT
+    # PURPOSE: A* search using the landmark table for its estimate, as
+    # DSAGraph.shortestPathALT. Runs as Dijkstra when there is no table
+    def shortestPathALT(self, source, destination):
+        return self._searchRoute(self._requireId(source),
+                self._requireId(destination), self.landmarkIds is not None)
+
+    # ACCESSOR: _searchRoute
+    # PURPOSE: Dijkstra's algorithm from sourceId, or A* with the landmark
+    # lower bound max over landmarks L of |d(L, dest) - d(L, v)| when
+    # useLandmarks is True. Returns a DSARoute or None
+    def _searchRoute(self, sourceId, destId, useLandmarks):
+        # Per query arrays indexed by id, prevEntry is the row entry of the
+        # road used to reach each vertex
+        numVertex = self.getVertexCount()
+        dist = np.full(numVertex, np.inf)
+        prevId = np.full(numVertex, -1, dtype = np.int64)
+        prevEntry = np.full(numVertex, -1, dtype = np.int64)
+        settled = np.zeros(numVertex, dtype = bool)
+        estimate = np.zeros(numVertex)
+        numSettled = 0
+        if useLandmarks:
+            destDist = self.landmarkDist[:, destId]
+
+        heap = DSAIndexedHeap(numVertex)
+        dist[sourceId] = 0
+        heap.add(sourceId, 0)
+        found = False
+
+        while not heap.isEmpty() and not found:
+            vId = heap.remove()
+            settled[vId] = True
+            numSettled += 1
+
+            if vId == destId:
+                found = True
+            else:
+                for pos in range(self.indptr[vId], self.indptr[vId + 1]):
+                    wId = self.indices[pos]
+                    newDist = dist[vId] + self.weights[pos]
+
+                    if not settled[wId] and newDist < dist[wId]:
+                        # Estimate is worked out once, when first reached.
+                        # Landmarks reaching neither vertex give no bound
+                        if useLandmarks and dist[wId] == np.inf:
+                            with np.errstate(invalid = "ignore"):
+                                diff = np.abs(self.landmarkDist[:, wId] - destDist)
+                            diff[np.isnan(diff)] = 0.0
+                            estimate[wId] = diff.max()
+
+                        dist[wId] = newDist
+                        prevId[wId] = vId
+                        prevEntry[wId] = pos
+                        if heap.contains(wId):
+                            heap.decreaseKey(wId, newDist + estimate[wId])
+                        else:
+                            heap.add(wId, newDist + estimate[wId])
+
+        route = None
+        if found:
+            locations = DSALinkedList()
+            roads = DSALinkedList()
+            vId = destId
+            locations.insertFirst(str(self.labels[vId]))
+            while prevId[vId] != -1:
+                pos = prevEntry[vId]
+                roads.insertFirst(_DSAGraphEdge(None, None,
+                        str(self.roadNames[self.roadIds[pos]]), int(self.weights[pos]),
+                        int(self.roadIds[pos])))
+                vId = prevId[vId]
+                locations.insertFirst(str(self.labels[vId]))
+            route = DSARoute(int(dist[destId]), locations, roads, numSettled)
+
+        return route
@@ -5,17 +5,34 @@ from DSARoadGraph import DSAGraph, VertexNotFoundError, DuplicateVertexError, Du
 from VehicleHashTable import VehicleHashTable, KeyNotFoundError
 from DSALinkedList import DSALinkedList, ListEmptyError
 from Vehicle import Vehicle, IncorrectParameterError
-from fileioNetwork import readLocationCSV, readRoadsCSV, readVehiclesCSV
+from fileioNetwork import (readLocationCSV, readRoadsCSV, readVehiclesCSV,
+        saveSnapshot, loadSnapshot, sourceSignature, SnapshotError, openMutationLog,
+        LazyNetwork)
 from VehicleSort import find_nearest_vehicle, find_vehicle_with_highest_battery, heapSortDistanceAsc, quickSortBattery
 
+# Snapshot of the network and vehicles loaded from the CSV files
+SNAPSHOT_FILE = "network.snap"
+CSV_FILES = ("locations.csv", "roads.csv", "vehicles.csv")
+# Changes made since the snapshot, folded into a new snapshot once the log
+# holds COMPACT_RECORDS of them
+LOG_FILE = "network.log"
+COMPACT_RECORDS = 1000
+
 def main():
-    network = DSAGraph()
-    vTable = VehicleHashTable(5)
     close = False
     
-    addLocationsCSV(network)
-    addRoadsCSV(network)
-    addVehiclesCSV(network, vTable)
+    # Queries are answered from the snapshot until something changes, the
+    # network and vehicles are only thawed and loaded when first needed
+    state, checksum = loadNetwork()
+    log, numReplayed = openMutationLog(LOG_FILE, checksum, state)
+    if numReplayed > 0:
+        print("Replayed", numReplayed, "changes from", LOG_FILE)
+    if log.recordCount >= COMPACT_RECORDS:
+        try:
+            log.compact(SNAPSHOT_FILE, state.getNetwork(), state.getVehicles(),
+                    sourceSignature(CSV_FILES))
+        except (OSError, ValueError) as err:
+            print("Could not save snapshot", err)
 
     while not close:
         showMenu()
@@ -25,7 +42,8 @@ def main():
         if option == '1':
             label = input("Enter the name of new location: ")
             try:
-                network.addVertex(label)
+                state.getNetwork().addVertex(label)
+                log.addLocation(label)
                 print("Location: " + label + " added\n")
             except DuplicateVertexError as err:
                 print(err)
@@ -34,7 +52,8 @@ def main():
         elif option == '2':
             label = input("Enter the name of location to delete: ")
             try:
-                network.deleteVertex(label)
+                state.getNetwork().deleteVertex(label)
+                log.deleteLocation(label)
                 print("Location: deleted")
             except VertexNotFoundError as err:
                 print(err)
@@ -48,7 +67,8 @@ def main():
 
             try:
                 distance = int(inDistance)
-                network.addEdge(label1, label2, roadName, distance)
+                state.getNetwork().addEdge(label1, label2, roadName, distance)
+                log.addRoad(label1, label2, roadName, distance)
                 print("Road added \n")
             except VertexNotFoundError as err:
                 print(err)
@@ -64,20 +84,21 @@ def main():
             label1 = input("Enter name of starting location: ")
             label2 = input("Enter name of destination: ")
             try:
-                network.deleteEdge(label1, label2)
+                if state.getNetwork().deleteEdge(label1, label2):
+                    log.deleteRoad(label1, label2)
             except VertexNotFoundError as err:
                 print(err) 
         
         # Display Network
         elif option == '5':
-            network.displayAsList()            
+            state.getGraph().displayAsList()            
         
         # Check Path Existence
         elif option == '6':
             location1 = input("Enter first location: ")
             location2 = input("Enter second location: ")
             try:
-                isPath = network.is_path(location1, location2)
+                isPath = state.getGraph().is_path(location1, location2)
                 print("\nPath Exists:",isPath)
             except VertexNotFoundError as err:
                 print("Location does not exist",err)
@@ -89,7 +110,7 @@ def main():
             dest = input("Enter vehicle destination: ")
             inDistDest = input("Enter vehicle distance to destination: ")
             inBattery = input("Enter battery percentage: ")
-            inVehicle = Vehicle(vehicleID,"","","","" ,network)
+            inVehicle = Vehicle(vehicleID,"","","","" ,state.getGraph())
             try:
                 battery = int(inBattery)
                 distDest = int(inDistDest)
@@ -97,7 +118,8 @@ def main():
                 inVehicle.setDestination(dest)
                 inVehicle.setDistanceToDestination(distDest)
                 inVehicle.setBatteryLevel(battery)
-                vTable.insert(inVehicle)
+                state.getVehicles().insert(inVehicle)
+                log.addVehicle(inVehicle)
                 print("Vehicle Added")            
             except VertexNotFoundError as err:
                 print("\nLocation does not exist:", err)
@@ -111,37 +133,38 @@ def main():
             vehicleID = input("Enter ID of vehicle to delete: ")
             
             try:
-                vTable.delete(vehicleID)
+                state.getVehicles().delete(vehicleID)
+                log.deleteVehicle(vehicleID)
                 print("Vehicle deleted successfully")
             except KeyNotFoundError as err:
                 print("\nVehicle Id doest not exist.",err)     
 
         # Print Vehicles
         elif option == '9':
-            vTable.printVehicles()
+            state.getVehicles().printVehicles()
 
         # Find Nearest Vehicle
         elif option == '10':
             print("Nearest Vehicle: ")
-            vehicleList = vTable.getVehicleList()
+            vehicleList = state.getVehicles().getVehicleList()
             print(find_nearest_vehicle(vehicleList))
 
         # Find Highest Battery Vehicle
         elif option == '11':
             print("Highest Battery Vehicle")
-            vehicleList = vTable.getVehicleList()
+            vehicleList = state.getVehicles().getVehicleList()
             print(find_vehicle_with_highest_battery(vehicleList))
         
         # Sorted by Distance To Destination Ascending
         elif option == '12':
-            vehicleList = vTable.getVehicleList()
+            vehicleList = state.getVehicles().getVehicleList()
             sortedList = heapSortDistanceAsc(vehicleList)
             for vehicle in sortedList:
                 print(vehicle)
         
         # Sort by battery descending
         elif option == '13':
-            vehicleList = vTable.getVehicleList()
+            vehicleList = state.getVehicles().getVehicleList()
             sortedList = quickSortBattery(vehicleList)
             for vehicle in sortedList:
                 print(vehicle)
@@ -149,13 +172,73 @@ def main():
         # Search for vehicle
         elif option == '14':
             searchFor = input("Enter Vehicle ID to find: ")
-            print(vTable.search(searchFor))
+            print(state.getVehicles().search(searchFor))
+
+        # Find Shortest Route
+        elif option == '15':
+            location1 = input("Enter starting location: ")
+            location2 = input("Enter destination: ")
+            try:
+                # The snapshot holds the landmark table for its graph. Once
+                # roads change, a table saved for the changed network is
+                # loaded, or a new one built and saved
+                if not state.isThawed():
+                    route = state.getGraph().shortestPathALT(location1, location2)
+                else:
+                    if not state.getNetwork().hasLandmarks():
+                        addLandmarks(state.getNetwork())
+                    route = state.getNetwork().shortestPathALT(location1, location2)
+                if route is None:
+                    print("\nNo route exists between locations")
+                else:
+                    print()
+                    print(route)
+            except VertexNotFoundError as err:
+                print("Location does not exist", err)
 
         elif option == '0':
             close = True
         else:
             print("\nIncorrect menu option\n")
 
+        # Make the change durable before the next option is taken
+        log.sync()
+
+    log.close()
+
+def loadNetwork():
+    # Use the snapshot if it was saved from the current CSV files, otherwise
+    # load the CSV files and save a new snapshot of them
+    # Returns a LazyNetwork over the snapshot or the loaded files and the
+    # checksum of the snapshot, which the mutation log follows
+    signature = sourceSignature(CSV_FILES)
+    checksum = 0
+    snapshot = None
+    try:
+        snapshot = loadSnapshot(SNAPSHOT_FILE)
+    except FileNotFoundError:
+        snapshot = None
+    except SnapshotError as err:
+        print("Snapshot not used:", err.message)
+
+    if snapshot is not None and snapshot.sourceSignature == signature:
+        state = LazyNetwork(snapshot)
+        checksum = snapshot.checksum
+        print("\nLocations, roads and vehicles loaded from snapshot.")
+    else:
+        network = DSAGraph()
+        vTable = VehicleHashTable(5)
+        addLocationsCSV(network)
+        addRoadsCSV(network)
+        addVehiclesCSV(network, vTable)
+        try:
+            checksum = saveSnapshot(SNAPSHOT_FILE, network, vTable, signature)
+        except (OSError, ValueError) as err:
+            print("Could not save snapshot", err)
+        state = LazyNetwork(None, network, vTable)
+
+    return state, checksum
+
 def addLocationsCSV(network):
     try:
         readLocationCSV("locations.csv", network)
@@ -163,6 +246,8 @@ def addLocationsCSV(network):
         print("Files already added.")
     except IndexError as err:
         print("Csv file is incorrectly formatted.",err)
+    except ValueError as err:
+        print("Csv file location coordinates must be numbers.",err)
 
 def addRoadsCSV(network):
     try:    
@@ -191,6 +276,20 @@ def addVehiclesCSV(network, vTable):
         print("Incorrect formatting of CSV File")
         print("Vehicles add incomplete")
 
+def addLandmarks(network):
+    # Load saved landmark tables, rebuilding them if missing or out of date
+    try:
+        loaded = network.loadLandmarks("landmarks.npz")
+    except (FileNotFoundError, KeyError, ValueError):
+        loaded = False
+
+    if not loaded:
+        network.buildLandmarks()
+        try:
+            network.saveLandmarks("landmarks.npz")
+        except OSError as err:
+            print("Could not save route landmarks", err)
+
 def showMenu():
     print("\n 1) Add Location Manually")
     print(" 2) Delete Location")
@@ -206,6 +305,7 @@ def showMenu():
     print("12) Display Vehicles by Distance to destination, ascending")
     print("13) Display Vehicles by Battery Level, descending")
     print("14) Search for a vehicle")
+    print("15) Find Shortest Route")
     print("0) Exit")
 
 main()
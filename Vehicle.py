@@ -14,6 +14,9 @@ class IncorrectParameterError(Exception):
         self.message = message
 
 class Vehicle:
+    __slots__ = ("_vehicleID", "_location", "_dest", "_distDest", "_battery",
+            "_network")
+
     def __init__(self, vehicleID, location, dest, distDest, battery, network):
         self._vehicleID = vehicleID
         self._location = location
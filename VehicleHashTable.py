@@ -2,6 +2,7 @@
 # Hash Table implemntation for vehicles
 
 import math
+import zlib
 import numpy as np
 from DSALinkedList import DSALinkedList, ListEmptyError
 from DSARoadGraph import DSAGraph, VertexNotFoundError, DuplicateVertexError, DuplicateEdgeError
@@ -14,60 +15,81 @@ class KeyNotFoundError(Exception):
     def __init__(self, message):
         self.message = message
 
-class DSAHashEntry:
-    def __init__(self, key = None, value = None):
-        # Set key to input otherwise set key to empty string if not input
-        if key is not None:
-            self.key = key
-        else:
-            self.key = ""
-
-        self.value = value
-
-        # States: 0 = never used, 1 = used, -1 = formerly-used
-        # Set state to 1 if key input otherwise set it to 0
-        if key is not None:
-            self.state = 1
-        else:
-            self.state = 0
-
-# Based on DSA Hash Table From Prac 7 Submission
+# States of a slot
+EMPTY = 0 # never used
+USED = 1
+DELETED = -1 # formerly used, probing continues past it
+
+# Seed of the second crc in a hash code, any value other than 0 will do
+STEP_SEED = 0x9E3779B9
+
+# Old slots moved to the new arrays by each operation during an
+# incremental resize
+MIGRATE_SLOTS = 256
+
+# Slots of one table size as parallel arrays: hash code, state, key and
+# value of each slot
+class _HashSlots:
+    __slots__ = ("hashes", "states", "keys", "values", "hashView", "stateView")
+
+    def __init__(self, size):
+        self.hashes = np.zeros(size, dtype = np.int64)
+        self.states = np.zeros(size, dtype = np.int8)
+        self.keys = np.empty(size, dtype = object)
+        self.values = np.empty(size, dtype = object)
+
+        # Probing reads single hashes and states, which is much cheaper
+        # through a memoryview than by indexing the numpy arrays
+        self.hashView = memoryview(self.hashes)
+        self.stateView = memoryview(self.states)
+
+
+# Based on DSA Hash Table From Prac 7 Submission, with the entries split
+# into parallel arrays. The hash code is stored so resizes dont hash the
+# key again, and is compared before the key so most collisions skip the
+# string compare.
+# A resize places every entry in one vectorised pass. With incremental
+# set it instead keeps the old arrays and moves MIGRATE_SLOTS of them per
+# later operation, so no single insert pays for copying the whole table.
+# With robinHood set the table uses Robin Hood linear probing instead of
+# double hashing, see _placeRobinHood
 class VehicleHashTable: 
-    def __init__(self, tableSize):
+    def __init__(self, tableSize, incremental = False, robinHood = False):
         if tableSize < 5:
             tableSize = 5
         # Set actual size to nextPrime of table size
         actualSize = self._nextPrime(tableSize)
+        self._slots = _HashSlots(actualSize)
 
-
-        # Allocate hash array size of actual size with hash entries
-        self.hashArray = np.empty(actualSize, dtype = object)
-        for i in range(actualSize):
-            self.hashArray[i] = DSAHashEntry()
+        # Arrays being emptied by an incremental resize, and the next of
+        # their slots to move
+        self.incremental = incremental
+        self.robinHood = robinHood
+        self._oldSlots = None
+        self._migrateIdx = 0
 
         self.count = 0
         
-        # Upper and lower threshold values for load factor - resizing
+        # Upper and lower threshold values for load factor - resizing.
+        # Robin Hood keeps probe sequences short enough to run fuller
         self.lowerThreshold = 0.2
         self.upperThreshold = 0.7
-
-    # Shift-Add-XOR Hash from lecture slides
-    def _hash(self, vehicleID):
-        hashIdx = 0
-        for char in vehicleID:
-            code = ord(char)
-            hashIdx = hashIdx ^ ((hashIdx << 5) + (hashIdx << 2) + code)
-
-        return abs(hashIdx) % len(self.hashArray)
+        if robinHood:
+            self.upperThreshold = 0.9
+
+    # Hash code of a vehicle ID from two crc32s of its bytes, computed in C
+    # rather than a Python loop per character. The whole code modulo the
+    # table size picks the home slot. The bits above 32 come from the seeded
+    # crc alone and pick the probe step, so IDs that share a home slot
+    # rarely share a probe sequence. Codes fit in 63 bits for the int64 array
+    def _hashCode(self, vehicleID):
+        data = vehicleID.encode()
+        return (zlib.crc32(data, STEP_SEED) << 31) ^ zlib.crc32(data)
 
     # stepHash function for calculating the step size in double hashing
-    # based of lecture slides
-    def _stepHash(self, vehicleID):
-        hashVal = self._hash(vehicleID)
-        stepHash = 5 - (hashVal % 5)
-        if stepHash == 0:
-            stepHash = 1
-        return stepHash
+    # based of lecture slides, from the high bits of the hash code
+    def _stepHash(self, hashCode):
+        return 5 - ((hashCode >> 32) % 5)
 
     # Next prime improved from lecture slides
     def _nextPrime(self, startVal):
@@ -93,112 +115,272 @@ class VehicleHashTable:
         return primeVal
     
     def getLoadFactor(self):
-        return self.count / len(self.hashArray)
+        return self.count / len(self._slots.states)
 
     def insert(self, vehicle):
         vehicleID = vehicle._vehicleID
+        self._migrate()
         loadFactor = self.getLoadFactor()
         if loadFactor >= self.upperThreshold:
-            self._resize(len(self.hashArray) * 2)
+            self._resize(len(self._slots.states) * 2)
 
-        # Get hash value for the input key
-        hashIdx = self._hash(vehicleID)
-        stepSize = self._stepHash(vehicleID) # For double hashing of step size
+        # A vehicle still in the old arrays moves to the new ones
+        hashCode = self._hashCode(vehicleID)
+        if self._oldSlots is not None:
+            oldIdx = self._findIn(self._oldSlots, hashCode, vehicleID)
+            if oldIdx != -1:
+                self._clear(self._oldSlots, oldIdx)
 
+        if self.robinHood:
+            self._insertRobinHood(hashCode, vehicleID, vehicle)
+        else:
+            self._insertDouble(hashCode, vehicleID, vehicle)
+
+    def _insertDouble(self, hashCode, vehicleID, vehicle):
+        slots = self._slots
+        idx = self._findSlot(slots, hashCode, vehicleID)
+        while idx == -1: # Table is full, grow it and probe again
+            self._resize(len(slots.states) * 2)
+            slots = self._slots
+            idx = self._findSlot(slots, hashCode, vehicleID)
+
+        # Replace the vehicle stored for the key
+        if slots.stateView[idx] == USED:
+            slots.values[idx] = vehicle
+        else:
+            slots.hashes[idx] = hashCode
+            slots.states[idx] = USED
+            slots.keys[idx] = vehicleID
+            slots.values[idx] = vehicle
+            self.count += 1
+
+    # Return the slot holding vehicleID, or if it isnt in the table the
+    # first free slot on its probe sequence. A deleted slot is only reused
+    # once the sequence shows the key isnt further along
+    def _findSlot(self, slots, hashCode, vehicleID):
+        tableSize = len(slots.states)
+        states = slots.stateView
+        hashes = slots.hashView
+        keys = slots.keys
+
+        # Get hash value and step size for double hashing
+        hashIdx = hashCode % tableSize
+        stepSize = self._stepHash(hashCode)
         origIdx = hashIdx # Store in case hashtable is full
+        freeIdx = -1
         found = False
         giveUp = False
 
-        # Probe for slot to put in
+        # Probe for key location
         while not found and not giveUp:
-            # Get entry at hash index
-            entry = self.hashArray[hashIdx]
-
-            # Check if slots empty or previously used
-            if entry.state == 0 or entry.state == -1:
-                # Insert key and value into the slot and incremment count
-                self.hashArray[hashIdx] = DSAHashEntry(vehicleID, vehicle)
-                self.count += 1
-                found = True
-            
-            # Check if slot contains the same key and is used
-            elif entry.key == vehicleID and entry.state == 1:
-                self.hashArray[hashIdx].value = vehicle
-                found = True
-            
-            # Move to next slot with double hashing
-            else:
-                hashIdx = (hashIdx + stepSize) % len(self.hashArray)
-                # Table is full
-                if hashIdx == origIdx:
+            state = states[hashIdx]
+
+            # Key is found, compare the cached hash before the key
+            if state == USED:
+                found = hashes[hashIdx] == hashCode and keys[hashIdx] == vehicleID
+
+            elif state == EMPTY: # Stop if at a never used entry
+                giveUp = True
+
+            elif freeIdx == -1: # First formerly used entry
+                freeIdx = hashIdx
+
+            if not found and not giveUp: # Probe to next slot using double hashing
+                hashIdx = (hashIdx + stepSize) % tableSize
+                if hashIdx == origIdx: # Stop if checked all slots
                     giveUp = True
+                    hashIdx = -1
 
-        # Resize table if the table is full
-        if not found:
-            self._resize(len(self.hashArray) * 2)
-            self.insert(vehicle)
+        if not found and freeIdx != -1:
+            hashIdx = freeIdx
 
-    def _findKey(self, vehicleID):
-        # Get hash value for the input key
-        hashIdx = self._hash(vehicleID)
-        origIdx = hashIdx # Store in case hash table is full
-        stepSize = self._stepHash(vehicleID) # Calculate stepsize - double hashing
+        return hashIdx
 
+    # Mark a slot formerly used and release its key and vehicle
+    def _clear(self, slots, idx):
+        slots.states[idx] = DELETED
+        slots.keys[idx] = None
+        slots.values[idx] = None
+        self.count -= 1
+
+    # Return the slot of slots holding vehicleID, or -1 if it isnt there
+    def _findIn(self, slots, hashCode, vehicleID):
+        if self.robinHood:
+            idx = self._findRobinHood(slots, hashCode, vehicleID)
+        else:
+            idx = self._findSlot(slots, hashCode, vehicleID)
+            if idx != -1 and slots.stateView[idx] != USED:
+                idx = -1
+        return idx
+
+    # Return the arrays and slot holding vehicleID, checking the old arrays
+    # of an incremental resize after the current ones. Slot is -1 if the
+    # key isnt in the table
+    def _findKey(self, vehicleID):
+        self._migrate()
+        hashCode = self._hashCode(vehicleID)
+        slots = self._slots
+        idx = self._findIn(slots, hashCode, vehicleID)
+
+        if idx == -1 and self._oldSlots is not None:
+            slots = self._oldSlots
+            idx = self._findIn(slots, hashCode, vehicleID)
+
+        return slots, idx
+
+    # Robin Hood linear probing: an entry being placed takes the slot of any
+    # entry nearer its home slot than the new one is to its own, and that
+    # entry moves on instead. Every entry ends up about as far from home as
+    # the others, so probe sequences stay short at high load. The distance
+    # of an entry from home comes from its cached hash, and the slots hold
+    # no deleted state: deletion shifts the following entries back
+    def _insertRobinHood(self, hashCode, vehicleID, vehicle):
+        slots = self._slots
+        idx = self._findRobinHood(slots, hashCode, vehicleID)
+
+        # Replace the vehicle stored for the key
+        if idx != -1:
+            slots.values[idx] = vehicle
+        else:
+            self._placeRobinHood(slots, hashCode, vehicleID, vehicle)
+            self.count += 1
+
+    def _placeRobinHood(self, slots, hashCode, vehicleID, vehicle):
+        tableSize = len(slots.states)
+        states = slots.stateView
+        hashes = slots.hashView
+        keys = slots.keys
+        values = slots.values
+
+        hashIdx = hashCode % tableSize
+        dist = 0
+        placed = False
+
+        while not placed:
+            if states[hashIdx] == EMPTY:
+                hashes[hashIdx] = hashCode
+                states[hashIdx] = USED
+                keys[hashIdx] = vehicleID
+                values[hashIdx] = vehicle
+                placed = True
+            else:
+                residentDist = (hashIdx - hashes[hashIdx]) % tableSize
+
+                # Take the slot from an entry nearer home, carry it on
+                if residentDist < dist:
+                    residentHash = hashes[hashIdx]
+                    residentKey = keys[hashIdx]
+                    residentValue = values[hashIdx]
+                    hashes[hashIdx] = hashCode
+                    keys[hashIdx] = vehicleID
+                    values[hashIdx] = vehicle
+                    hashCode = residentHash
+                    vehicleID = residentKey
+                    vehicle = residentValue
+                    dist = residentDist
+
+                hashIdx = (hashIdx + 1) % tableSize
+                dist += 1
+
+    # Deleted slots only appear in the old arrays of an incremental resize,
+    # they keep their hash so probing passes over them as it would the
+    # entry that was there
+    def _findRobinHood(self, slots, hashCode, vehicleID):
+        tableSize = len(slots.states)
+        states = slots.stateView
+        hashes = slots.hashView
+        keys = slots.keys
+
+        hashIdx = hashCode % tableSize
+        dist = 0
         found = False
         giveUp = False
 
-        # Probe for key location
         while not found and not giveUp:
-            # Get entry at hash index
-            entry = self.hashArray[hashIdx]
-
-            if entry.state == 0: # Stop if at a never used entry
+            if states[hashIdx] == EMPTY: # Stop if at a never used entry
                 giveUp = True
 
-            elif entry.key == vehicleID and entry.state == 1: # Key is found
+            # Key is found, compare the cached hash before the key
+            elif hashes[hashIdx] == hashCode and keys[hashIdx] == vehicleID:
                 found = True
 
-            else: # Probe to next slot using double hashing
-                hashIdx = (hashIdx + stepSize) % len(self.hashArray)
-                if hashIdx == origIdx: # Stop if checked all nodes
-                    giveUp = True
+            # An entry nearer its home would have been displaced by the
+            # key, so the key isnt further along
+            elif (hashIdx - hashes[hashIdx]) % tableSize < dist:
+                giveUp = True
+
+            else:
+                hashIdx = (hashIdx + 1) % tableSize
+                dist += 1
 
         if not found:
-            hashIdx = -1 
-        
+            hashIdx = -1
+
         return hashIdx
 
+    # Remove the entry at idx by moving each following entry that isnt in
+    # its home slot back one, until an empty slot or an entry at home
+    def _deleteRobinHood(self, slots, idx):
+        tableSize = len(slots.states)
+        states = slots.stateView
+        hashes = slots.hashView
+        keys = slots.keys
+        values = slots.values
+
+        nextIdx = (idx + 1) % tableSize
+        while states[nextIdx] == USED and (nextIdx - hashes[nextIdx]) % tableSize != 0:
+            hashes[idx] = hashes[nextIdx]
+            keys[idx] = keys[nextIdx]
+            values[idx] = values[nextIdx]
+            idx = nextIdx
+            nextIdx = (idx + 1) % tableSize
+
+        states[idx] = EMPTY
+        keys[idx] = None
+        values[idx] = None
+        self.count -= 1
+
     def search(self, vehicleID):
-        idx = self._findKey(vehicleID) # Find the index of key
+        slots, idx = self._findKey(vehicleID) # Find the index of key
         if idx == -1:
             raise KeyNotFoundError("Key not found in hash table")
         else:
-            return self.hashArray[idx].value # Return value of key input
+            return slots.values[idx] # Return value of key input
 
     def delete(self, vehicleID):
-        idx = self._findKey(vehicleID) # Find index of key
+        slots, idx = self._findKey(vehicleID) # Find index of key
         if idx == -1:
             raise KeyNotFoundError("Key not found in hash table")
         else:
-            self.hashArray[idx].state = -1 # Set state as previously used
-            self.count -= 1 
+            # Old arrays of an incremental resize only ever mark deletions
+            if self.robinHood and slots is self._slots:
+                self._deleteRobinHood(slots, idx)
+            else:
+                self._clear(slots, idx)
 
             # Resize after removal when needed, confirm table size more than 5
             loadFactor = self.getLoadFactor()
             
-            if loadFactor < self.lowerThreshold and len(self.hashArray) > 5:
-                newSize = max(len(self.hashArray) // 2, 5)
+            if loadFactor < self.lowerThreshold and len(self._slots.states) > 5:
+                newSize = max(len(self._slots.states) // 2, 5)
                 self._resize(newSize)
 
+    # MUTATOR: reserve
+    # PURPOSE: Grow the table once so count vehicles fit under the load
+    # factor, saving the repeated resizes of inserting them one at a time
+    def reserve(self, count):
+        if count / len(self._slots.states) >= self.upperThreshold:
+            self._resize(int(count / self.upperThreshold) + 1)
+
     def hasKey(self, inKey):
-        return self._findKey(inKey) != -1 # Return true if key exists
+        return self._findKey(inKey)[1] != -1 # Return true if key exists
 
     def export(self):
+        self._finishMigration()
+        slots = self._slots
         linkedList = DSALinkedList()
-        for i in range(len(self.hashArray)):
-            entry = self.hashArray[i]
-            if entry.state == 1:
-                linkedList.insertLast(f"{entry.key},{entry.value}\n")
+        for i in np.flatnonzero(slots.states == USED):
+            linkedList.insertLast(f"{slots.keys[i]},{slots.values[i]}\n")
         
         return linkedList
 
@@ -206,32 +388,117 @@ class VehicleHashTable:
         # Recalculate new prime after doubling/halving
         newSize = self._nextPrime(newSize)
 
-        # Create new array
-        oldHashArr = self.hashArray
-        self.hashArray = np.empty(newSize, dtype = object)
-        for i in range(newSize):
-            self.hashArray[i] = DSAHashEntry()
-
-        # Reinsert the entries
-        self.count = 0
-        for entry in oldHashArr:
-            if entry.state == 1:
-                self.insert(entry.value)
+        # A resize during an incremental one first finishes moving the
+        # old arrays
+        self._finishMigration()
+        self._oldSlots = self._slots
+        self._slots = _HashSlots(newSize)
+        self._migrateIdx = 0
+
+        if not self.incremental:
+            self._finishMigration()
+
+    # Move the next MIGRATE_SLOTS old slots of an incremental resize
+    def _migrate(self):
+        if self._oldSlots is not None:
+            self._moveSlots(self._migrateIdx, self._migrateIdx + MIGRATE_SLOTS)
+
+    def _finishMigration(self):
+        if self._oldSlots is not None:
+            self._moveSlots(self._migrateIdx, len(self._oldSlots.states))
+
+    # Move the live entries of old slots start to end into the current
+    # arrays, no key is hashed again
+    def _moveSlots(self, start, end):
+        old = self._oldSlots
+        end = min(end, len(old.states))
+        live = start + np.flatnonzero(old.states[start:end] == USED)
+
+        if self.robinHood:
+            for i in live:
+                self._placeRobinHood(self._slots, int(old.hashes[i]),
+                        old.keys[i], old.values[i])
+        else:
+            self._placeDouble(old, live)
+
+        # Release the moved slots, keeping them deleted rather than empty so
+        # probing the old arrays still passes over them
+        old.states[live] = DELETED
+        old.keys[live] = None
+        old.values[live] = None
+
+        self._migrateIdx = end
+        if end == len(old.states):
+            self._oldSlots = None
+
+    # Place the old entries at live in one vectorised pass. Each round puts
+    # every entry whose probe position is free, the first of any that share
+    # one, and steps the rest along their probe sequences. An entry only
+    # steps past a slot that is taken, so every slot before it on its
+    # sequence is taken and probing finds it just as if it were inserted
+    def _placeDouble(self, old, live):
+        slots = self._slots
+        tableSize = len(slots.states)
+        hashes = old.hashes[live]
+        pos = hashes % tableSize
+        steps = 5 - (hashes >> 32) % 5
+        pending = np.arange(len(live))
+
+        while len(pending) > 0:
+            cand = pos[pending]
+            first = np.zeros(len(pending), dtype = bool)
+            first[np.unique(cand, return_index = True)[1]] = True
+            placed = first & (slots.states[cand] == EMPTY)
+
+            moved = pending[placed]
+            at = cand[placed]
+            slots.hashes[at] = hashes[moved]
+            slots.states[at] = USED
+            slots.keys[at] = old.keys[live[moved]]
+            slots.values[at] = old.values[live[moved]]
+
+            pending = pending[~placed]
+            pos[pending] = (pos[pending] + steps[pending]) % tableSize
+
+    # ACCESSOR: getProbeStats
+    # PURPOSE: Return the average and longest number of slots probed to
+    # find each vehicle in the table, 1 being found in its home slot
+    def getProbeStats(self):
+        self._finishMigration()
+        slots = self._slots
+        tableSize = len(slots.states)
+        live = np.flatnonzero(slots.states == USED)
+        lengths = np.ones(len(live), dtype = np.int64)
+
+        # Robin Hood entries sit their distance from home along the table
+        if self.robinHood:
+            lengths += (live - slots.hashes[live]) % tableSize
+        else:
+            for j in range(len(live)):
+                hashCode = int(slots.hashes[live[j]])
+                hashIdx = hashCode % tableSize
+                stepSize = self._stepHash(hashCode)
+                while hashIdx != live[j]:
+                    hashIdx = (hashIdx + stepSize) % tableSize
+                    lengths[j] += 1
+
+        averageProbes = 0.0
+        maxProbes = 0
+        if len(live) > 0:
+            averageProbes = float(lengths.mean())
+            maxProbes = int(lengths.max())
+        return averageProbes, maxProbes
 
     def printVehicles(self):
-        for i in range(len(self.hashArray)):
-            entry = self.hashArray[i]
-            
-            if entry.state == 1:
-                print(entry.value, end="")
+        self._finishMigration()
+        slots = self._slots
+        for i in np.flatnonzero(slots.states == USED):
+            print(slots.values[i], end="")
 
     def getVehicleList(self):
+        self._finishMigration()
+        slots = self._slots
         vehicleList = DSALinkedList()
-        arrLen = len(self.hashArray)
-        ii = 0
-        while ii < arrLen:
-            entry = self.hashArray[ii]
-            if entry.state == 1:
-                vehicleList.insertLast(entry.value)
-            ii += 1
+        for i in np.flatnonzero(slots.states == USED):
+            vehicleList.insertLast(slots.values[i])
         return vehicleList
@@ -0,0 +1,389 @@
+#Name: Michael Durkan
+# Benchmarks of the road network on synthetic data
+
+import contextlib
+import io
+import math
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+from DSARoadGraph import DSAGraph, haversineDistance
+from Vehicle import Vehicle
+from VehicleHashTable import VehicleHashTable
+from fileioNetwork import (readLocationCSV, readRoadsCSV, readVehiclesCSV,
+        saveSnapshot, loadSnapshot)
+from DSAContractionHierarchy import DSAContractionHierarchy
+
+# Build a rows x cols grid of locations joined to their right and lower
+# neighbours, a mostly planar network like a city street map. Locations
+# are spaced about 10km apart around Perth and each road is 0-30% longer
+# than the straight line between its ends
+def makeGridNetwork(rows, cols, seed = 1, withCoordinates = True):
+    rng = random.Random(seed)
+    network = DSAGraph()
+
+    for r in range(rows):
+        for c in range(cols):
+            if withCoordinates:
+                network.addVertex(gridLabel(r, c), gridLatitude(r), gridLongitude(c))
+            else:
+                network.addVertex(gridLabel(r, c))
+
+    for r in range(rows):
+        for c in range(cols):
+            if c + 1 < cols:
+                network.addEdge(gridLabel(r, c), gridLabel(r, c + 1),
+                        "Row " + str(r) + " Rd",
+                        gridRoadLength(r, c, r, c + 1, rng))
+            if r + 1 < rows:
+                network.addEdge(gridLabel(r, c), gridLabel(r + 1, c),
+                        "Col " + str(c) + " St",
+                        gridRoadLength(r, c, r + 1, c, rng))
+
+    return network
+
+def gridLatitude(row):
+    return -31.95 - row * 0.09
+
+def gridLongitude(col):
+    return 115.86 + col * 0.11
+
+def gridRoadLength(row1, col1, row2, col2, rng):
+    straight = haversineDistance(gridLatitude(row1), gridLongitude(col1),
+            gridLatitude(row2), gridLongitude(col2))
+    return math.ceil(straight * rng.uniform(1.0, 1.3))
+
+def gridLabel(row, col):
+    return "R" + str(row).zfill(4) + "C" + str(col).zfill(4)
+
+# Run the same random point to point queries through each route search
+# and report average vertices settled and time per query
+def compareRouteSearches(network, searches, numQueries = 20, seed = 2):
+    rng = random.Random(seed)
+    labels = np.empty(network.getVertexCount(), dtype = object)
+    cur = network.vertices.head
+    for i in range(len(labels)):
+        labels[i] = cur.data._label
+        cur = cur.next
+
+    queries = np.empty(numQueries, dtype = object)
+    for i in range(numQueries):
+        queries[i] = (labels[rng.randrange(len(labels))],
+                labels[rng.randrange(len(labels))])
+
+    print(f"{'Search':<28}{'Avg settled':>14}{'Avg ms':>10}")
+    for name, search in searches:
+        totalSettled = 0
+        start = time.perf_counter()
+        for source, dest in queries:
+            route = search(source, dest)
+            if route is not None:
+                totalSettled += route.getSettledCount()
+        elapsed = time.perf_counter() - start
+
+        print(f"{name:<28}{totalSettled / numQueries:>14.1f}"
+                f"{elapsed * 1000 / numQueries:>10.2f}")
+
+def benchmarkRoutes(size = 100):
+    print(f"\nRoute searches on {size}x{size} grid network")
+    network = makeGridNetwork(size, size)
+
+    start = time.perf_counter()
+    network.buildLandmarks(8)
+    print(f"Built 8 landmarks in {time.perf_counter() - start:.2f}s")
+
+    compareRouteSearches(network, [
+        ("Dijkstra", network.shortestPath),
+        ("Bidirectional Dijkstra", network.shortestPathBidirectional),
+        ("A* (coordinates)", network.shortestPathAStar),
+        ("ALT (8 landmarks)", network.shortestPathALT)])
+
+def benchmarkContraction(size = 30):
+    print(f"\nContraction hierarchy on {size}x{size} grid network")
+    network = makeGridNetwork(size, size)
+    hierarchy = DSAContractionHierarchy(network)
+    hierarchy.build()
+    hierarchy.printBuildReport()
+    compareRouteSearches(network, [
+        ("Dijkstra", network.shortestPath),
+        ("Contraction hierarchy", hierarchy.shortestPath)])
+
+# Close random roads and reopen them a few closures later, as roadworks
+# do, checking reachability between random locations after each change
+def benchmarkClosures(size = 100, numClosures = 2000, seed = 3):
+    print(f"\nRoad closures on {size}x{size} grid network")
+    network = makeGridNetwork(size, size, withCoordinates = False)
+    rng = random.Random(seed)
+
+    closed = np.empty(numClosures, dtype = object)
+    closeTime = 0.0
+    queryTime = 0.0
+    numReachable = 0
+
+    # deleteEdge reports each deletion, keep that out of the timings
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(numClosures):
+            r = rng.randrange(size)
+            c = rng.randrange(size - 1)
+            label1 = gridLabel(r, c)
+            label2 = gridLabel(r, c + 1)
+            if rng.random() < 0.5:
+                label1 = gridLabel(c, r)
+                label2 = gridLabel(c + 1, r)
+
+            start = time.perf_counter()
+            if network.isAdjacent(label1, label2):
+                road = network.getEdge(label1, label2)
+                network.deleteEdge(label1, label2)
+                closed[i] = (label1, label2, road._roadName, road._distance)
+            if i >= 5 and closed[i - 5] is not None:
+                network.addEdge(*closed[i - 5])
+            closeTime += time.perf_counter() - start
+
+            source = gridLabel(rng.randrange(size), rng.randrange(size))
+            dest = gridLabel(rng.randrange(size), rng.randrange(size))
+            start = time.perf_counter()
+            if network.is_path(source, dest):
+                numReachable += 1
+            queryTime += time.perf_counter() - start
+
+    print(f"Avg ms per closure/reopening: {closeTime * 1000 / numClosures:.3f}")
+    print(f"Avg ms per is_path: {queryTime * 1000 / numClosures:.4f}")
+    print(f"Reachable pairs: {numReachable} of {numClosures}")
+
+# Hop counts from one location to all others, by printing breadth first
+# traversal of the linked graph and by level BFS over the frozen arrays.
+# The default 708x708 grid has just over one million roads
+def benchmarkFrozenBFS(size = 708):
+    print(f"\nBreadth first search on {size}x{size} grid network")
+    start = time.perf_counter()
+    network = makeGridNetwork(size, size, withCoordinates = False)
+    print(f"Built {network.getEdgeCount()} roads in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    frozen = network.freeze()
+    print(f"Froze in {time.perf_counter() - start:.1f}s")
+
+    # breadthFirstSearch prints every tree edge, keep that off the console
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        network.breadthFirstSearch()
+    linkedTime = time.perf_counter() - start
+
+    start = time.perf_counter()
+    hops, parents = frozen.hopDistances(gridLabel(0, 0))
+    frozenTime = time.perf_counter() - start
+
+    print(f"DSAGraph.breadthFirstSearch: {linkedTime:.2f}s")
+    print(f"DSAFrozenGraph.hopDistances: {frozenTime:.3f}s "
+            f"({linkedTime / frozenTime:.0f}x), furthest {hops.max()} roads")
+
+# Python heap allocated while loading locations, then roads, then vehicles
+# into their hash table, per item. Counts everything the load keeps alive:
+# objects, list nodes, label index and table entries
+def benchmarkMemory(size = 150, numVehicles = 50000, seed = 4):
+    print(f"\nMemory on {size}x{size} grid network with {numVehicles} vehicles")
+    rng = random.Random(seed)
+    tracemalloc.start()
+
+    before = tracemalloc.get_traced_memory()[0]
+    network = DSAGraph()
+    for r in range(size):
+        for c in range(size):
+            network.addVertex(gridLabel(r, c), gridLatitude(r), gridLongitude(c))
+    vertexBytes = tracemalloc.get_traced_memory()[0] - before
+
+    before = tracemalloc.get_traced_memory()[0]
+    for r in range(size):
+        for c in range(size):
+            if c + 1 < size:
+                network.addEdge(gridLabel(r, c), gridLabel(r, c + 1),
+                        "Row " + str(r) + " Rd", rng.randint(1, 30))
+            if r + 1 < size:
+                network.addEdge(gridLabel(r, c), gridLabel(r + 1, c),
+                        "Col " + str(c) + " St", rng.randint(1, 30))
+    roadBytes = tracemalloc.get_traced_memory()[0] - before
+
+    before = tracemalloc.get_traced_memory()[0]
+    vTable = VehicleHashTable(5)
+    for i in range(numVehicles):
+        location = gridLabel(rng.randrange(size), rng.randrange(size))
+        dest = gridLabel(rng.randrange(size), rng.randrange(size))
+        vTable.insert(Vehicle("V" + str(i).zfill(7), location, dest,
+                rng.randint(1, 500), rng.randint(0, 100), network))
+    vehicleBytes = tracemalloc.get_traced_memory()[0] - before
+
+    tracemalloc.stop()
+    print(f"Bytes per location: {vertexBytes / network.getVertexCount():.0f}")
+    print(f"Bytes per road: {roadBytes / network.getEdgeCount():.0f}")
+    print(f"Bytes per vehicle: {vehicleBytes / numVehicles:.0f}")
+
+# Write grid locations, roads and vehicles to CSV files and time loading
+# them through the file readers, which report their own rows per second
+def benchmarkLoading(size = 300, numVehicles = 200000, seed = 5):
+    print(f"\nLoading {size}x{size} grid network and {numVehicles} vehicles from CSV")
+    rng = random.Random(seed)
+    folder = tempfile.mkdtemp()
+    locationFile = os.path.join(folder, "locations.csv")
+    roadFile = os.path.join(folder, "roads.csv")
+    vehicleFile = os.path.join(folder, "vehicles.csv")
+
+    with open(locationFile, "w") as f:
+        for r in range(size):
+            for c in range(size):
+                f.write(f"{gridLabel(r, c)},{gridLatitude(r)},{gridLongitude(c)}\n")
+
+    with open(roadFile, "w") as f:
+        for r in range(size):
+            for c in range(size):
+                if c + 1 < size:
+                    f.write(f"{gridLabel(r, c)},{gridLabel(r, c + 1)},Row {r} Rd,"
+                            f"{gridRoadLength(r, c, r, c + 1, rng)}\n")
+                if r + 1 < size:
+                    f.write(f"{gridLabel(r, c)},{gridLabel(r + 1, c)},Col {c} St,"
+                            f"{gridRoadLength(r, c, r + 1, c, rng)}\n")
+
+    with open(vehicleFile, "w") as f:
+        for i in range(numVehicles):
+            f.write(f"V{str(i).zfill(7)},"
+                    f"{gridLabel(rng.randrange(size), rng.randrange(size))},"
+                    f"{gridLabel(rng.randrange(size), rng.randrange(size))},"
+                    f"{rng.randint(1, 500)},{rng.randint(0, 100)}\n")
+
+    network = DSAGraph()
+    vTable = VehicleHashTable(5)
+    readLocationCSV(locationFile, network)
+    readRoadsCSV(roadFile, network)
+    readVehiclesCSV(vehicleFile, network, vTable)
+
+    # The same data through a binary snapshot
+    snapshotFile = os.path.join(folder, "network.snap")
+    start = time.perf_counter()
+    saveSnapshot(snapshotFile, network, vTable)
+    print(f"\nSaved snapshot in {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    snapshot = loadSnapshot(snapshotFile)
+    print(f"Mapped snapshot in {time.perf_counter() - start:.3f}s, "
+            f"ready for frozen graph queries")
+
+    start = time.perf_counter()
+    thawed = snapshot.graph.thaw()
+    snapshot.loadVehicles(thawed, VehicleHashTable(5))
+    print(f"Rebuilt graph and vehicle table from snapshot in "
+            f"{time.perf_counter() - start:.2f}s")
+
+    del snapshot
+    for filename in (locationFile, roadFile, vehicleFile, snapshotFile):
+        os.remove(filename)
+    os.rmdir(folder)
+
+# Insert numVehicles vehicles with sequential IDs into the vehicle table,
+# then search random IDs, reporting time per operation, slots probed per
+# vehicle and the heap the table itself allocates per vehicle. Inserts are
+# timed one at a time, the slowest being those that resize the table,
+# with resizes done all at once and incrementally
+def benchmarkVehicleTable(numVehicles = 1000000, numSearches = 200000, seed = 6):
+    print(f"\nVehicle hash table with {numVehicles} vehicles")
+    vehicles = np.empty(numVehicles, dtype = object)
+    for i in range(numVehicles):
+        vehicles[i] = Vehicle("V" + str(i).zfill(7), "", "", 0, 0, None)
+
+    print(f"{'Resize':<14}{'Avg insert us':>15}{'Max insert ms':>15}"
+            f"{'99.99% ms':>11}{'Avg search us':>15}")
+    for name, incremental in (("All at once", False), ("Incremental", True)):
+        rng = random.Random(seed)
+        vTable = VehicleHashTable(5, incremental)
+        insertTimes = np.empty(numVehicles)
+        for i in range(numVehicles):
+            start = time.perf_counter()
+            vTable.insert(vehicles[i])
+            insertTimes[i] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for i in range(numSearches):
+            vTable.search("V" + str(rng.randrange(numVehicles)).zfill(7))
+        searchTime = time.perf_counter() - start
+
+        print(f"{name:<14}{insertTimes.mean() * 1e6:>15.2f}"
+                f"{insertTimes.max() * 1000:>15.1f}"
+                f"{np.percentile(insertTimes, 99.99) * 1000:>11.2f}"
+                f"{searchTime * 1e6 / numSearches:>15.2f}")
+
+    # Again under tracemalloc, which slows the inserts too much to time
+    vTable = None
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    vTable = VehicleHashTable(5)
+    for vehicle in vehicles:
+        vTable.insert(vehicle)
+    tableBytes = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    print(f"Table bytes per vehicle: {tableBytes / numVehicles:.0f}, "
+            f"load factor {vTable.getLoadFactor():.2f}")
+    averageProbes, maxProbes = vTable.getProbeStats()
+    print(f"Slots probed per vehicle: avg {averageProbes:.2f}, max {maxProbes}")
+
+# Double hashing against Robin Hood probing with the vehicle table held at
+# a fixed load factor. Reports slots probed per stored vehicle and lookup
+# times for stored and missing IDs, then again after replacing half the
+# vehicles, which leaves deleted slots behind under double hashing
+def benchmarkProbing(numVehicles = 200000, numSearches = 100000, seed = 7):
+    print(f"\nProbing schemes with {numVehicles} vehicles")
+    vehicles = np.empty(numVehicles * 3 // 2, dtype = object)
+    for i in range(len(vehicles)):
+        vehicles[i] = Vehicle("V" + str(i).zfill(7), "", "", 0, 0, None)
+
+    print(f"{'Scheme':<22}{'Avg probes':>11}{'Max':>6}{'Hit us':>9}{'Miss us':>9}"
+            f"{'Churned avg':>13}{'Max':>6}{'Hit us':>9}")
+    for name, robinHood, load in (("Double hashing 0.7", False, 0.7),
+            ("Double hashing 0.9", False, 0.9),
+            ("Robin Hood 0.7", True, 0.7), ("Robin Hood 0.9", True, 0.9)):
+        rng = random.Random(seed)
+        # Sized for the load and kept there, never resized
+        vTable = VehicleHashTable(int(numVehicles / load), robinHood = robinHood)
+        vTable.upperThreshold = 1.0
+        vTable.lowerThreshold = 0.0
+        for i in range(numVehicles):
+            vTable.insert(vehicles[i])
+
+        row = f"{name:<22}"
+        averageProbes, maxProbes = vTable.getProbeStats()
+        hitTime = timeSearches(vTable, numSearches, 0, numVehicles, rng)
+        missTime = timeSearches(vTable, numSearches, numVehicles,
+                len(vehicles), rng)
+        row += f"{averageProbes:>11.2f}{maxProbes:>6}{hitTime:>9.2f}{missTime:>9.2f}"
+
+        # Replace the first half of the vehicles with new ones
+        for i in range(numVehicles // 2):
+            vTable.delete(vehicles[i]._vehicleID)
+            vTable.insert(vehicles[numVehicles + i])
+        averageProbes, maxProbes = vTable.getProbeStats()
+        hitTime = timeSearches(vTable, numSearches, numVehicles // 2,
+                len(vehicles), rng)
+        print(row + f"{averageProbes:>13.2f}{maxProbes:>6}{hitTime:>9.2f}")
+
+# Average microseconds to search random IDs numbered low to high
+def timeSearches(vTable, numSearches, low, high, rng):
+    ids = np.empty(numSearches, dtype = object)
+    for i in range(numSearches):
+        ids[i] = "V" + str(rng.randrange(low, high)).zfill(7)
+
+    start = time.perf_counter()
+    for vehicleID in ids:
+        vTable.hasKey(vehicleID)
+    return (time.perf_counter() - start) * 1e6 / numSearches
+
+if __name__ == "__main__":
+    benchmarkRoutes()
+    benchmarkContraction()
+    benchmarkClosures()
+    benchmarkFrozenBFS()
+    benchmarkMemory()
+    benchmarkLoading()
+    benchmarkVehicleTable()
+    benchmarkProbing()
@@ -1,24 +1,75 @@
 # Name: Michael Durkan
 # File Io code for the graph and vehicle table 
 
-from DSARoadGraph import DSAGraph, VertexNotFoundError, DuplicateVertexError
-from DSALinkedList import ListEmptyError
+from DSARoadGraph import (DSAGraph, DSAFrozenGraph, VertexNotFoundError,
+        DuplicateVertexError, DuplicateEdgeError)
+from DSALinkedList import DSALinkedList, ListEmptyError
 from VehicleHashTable import VehicleHashTable, KeyNotFoundError
 from Vehicle import Vehicle, IncorrectParameterError
+import os
+import shutil
+import struct
+import time
+import zlib
 import numpy as np
 
-def readLocationCSV(filename, network):
+# Bytes read from a file at a time
+CHUNK_SIZE = 1 << 20
+
+# Count the rows of a file by counting newlines a chunk at a time, a line
+# without a final newline still counts
+def countRows(filename):
+    numRows = 0
+    lastChar = b"\n"
+    with open(filename, "rb") as f:
+        chunk = f.read(CHUNK_SIZE)
+        while chunk:
+            numRows += chunk.count(b"\n")
+            lastChar = chunk[-1:]
+            chunk = f.read(CHUNK_SIZE)
+
+    if lastChar != b"\n":
+        numRows += 1
+    return numRows
+
+# Generator of the comma separated fields of each row, reading whole lines
+# a chunk at a time so the file is never held in memory at once
+def readRows(f):
+    lines = f.readlines(CHUNK_SIZE)
+    while lines:
+        for line in lines:
+            yield line.strip().split(",")
+        lines = f.readlines(CHUNK_SIZE)
+
+def printThroughput(filename, numRows, startTime):
+    elapsed = max(time.perf_counter() - startTime, 1e-9)
+    print(f"{filename}: {numRows} rows in {elapsed:.2f}s "
+            f"({numRows / elapsed:.0f} rows/sec)")
+
+# sizeHint is the number of rows if known, otherwise the file is counted
+# first so the graph can be sized once
+def readLocationCSV(filename, network, sizeHint = None):
     
     try:
+        startTime = time.perf_counter()
+        if sizeHint is None:
+            sizeHint = countRows(filename)
+        network.reserve(sizeHint)
+
+        numRows = 0
         with open(filename, "r") as f:
-            lines = f.readlines()
+            for var in readRows(f):
+                numRows += 1
+                location= var[0]
 
-        for line in lines:
-            var = line.strip().split(",")
-            location= var[0]
-            network.addVertex(location)
+                # Optional latitude and longitude columns after the label
+                if len(var) >= 3 and var[1] != "" and var[2] != "":
+                    network.addVertex(location, float(var[1]), float(var[2]))
+                else:
+                    network.addVertex(location)
         
         print("\nLocations from CSV Added Succesfully.")
+        printThroughput(filename, numRows, startTime)
 
     except FileNotFoundError as err:
         print("Csv does not exist ",err)
@@ -26,54 +77,546 @@ def readLocationCSV(filename, network):
 def readRoadsCSV(filename, network):
     
     try:
+        startTime = time.perf_counter()
+        startCount = network.getEdgeCount()
+        numRows = 0
         with open(filename, "r") as f:
-            lines = f.readlines()
+            for var in readRows(f):
+                numRows += 1
+                start = var[0]
+                dest = var[1]
+                roadName = var[2]
+                try:
+                    distance = int(var[3])
+                except ValueError:
+                    print(roadName, " - Road not added due to lack of integer value")
+                try:
+                    network.addEdge(start, dest, roadName, distance)
+                except VertexNotFoundError:
+                    print(roadName, " - Road not added due locations not existing")
 
-        for line in lines:
-            var = line.strip().split(",")
-            start = var[0]
-            dest = var[1]
-            roadName = var[2]
-            try:
-                distance = int(var[3])
-            except ValueError:
-                print(roadName, " - Road not added due to lack of integer value")
-            try:
-                network.addEdge(start, dest, roadName, distance)
-            except VertexNotFoundError:
-                print(roadName, " - Road not added due locations not existing")
-        if network.getEdgeCount() == len(lines):
+        if network.getEdgeCount() - startCount == numRows:
             print("\nRoads from CSV Added Succesfully.")
         else:
             print("All roads without errors added")
+        printThroughput(filename, numRows, startTime)
 
     except FileNotFoundError as err:
         print("Csv does not exist ",err)
 
-def readVehiclesCSV(filename, network, vTable):
+# sizeHint as for readLocationCSV, sizes the vehicle table once
+def readVehiclesCSV(filename, network, vTable, sizeHint = None):
     
     try:
+        startTime = time.perf_counter()
+        if sizeHint is None:
+            sizeHint = countRows(filename)
+        vTable.reserve(vTable.count + sizeHint)
+
+        numRows = 0
         with open(filename, "r") as f:
-            lines = f.readlines()
+            for var in readRows(f):
+                numRows += 1
+                vehicleID = var[0]
+                location = var[1]
+                dest = var[2]
+                distDest = int(var[3])
+                battery = int(var[4])
+                if battery > 100 or battery < 0:
+                    raise TypeError("battery percentage must be below 0-100")
+                inVehicle = Vehicle(vehicleID, "", "", distDest, battery, network)
+                try:
+                    inVehicle.setDestination(dest)
+                    inVehicle.setLocation(location)
+                except VertexNotFoundError:
+                    print(vehicleID,": vehicle not added, locations do not exist")
 
-        for line in lines:
-            var = line.strip().split(",")
-            vehicleID = var[0]
-            location = var[1]
-            dest = var[2]
-            distDest = int(var[3])
-            battery = int(var[4])
-            if battery > 100 or battery < 0:
-                raise TypeError("battery percentage must be below 0-100")
-            inVehicle = Vehicle(vehicleID, "", "", distDest, battery, network)
-            try:
-                inVehicle.setDestination(dest)
-                inVehicle.setLocation(location)
-            except VertexNotFoundError:
-                print(vehicleID,": vehicle not added, locations do not exist")
-
-            vTable.insert(inVehicle)        
+                vTable.insert(inVehicle)        
         print("\nVehicles from CSV Added Succesfully.")
+        printThroughput(filename, numRows, startTime)
 
     except FileNotFoundError as err:
         print("Csv does not exist ",err)
+
+# Binary snapshot of a network and its vehicles. The file is a header, a
+# table of sections then each section's array data, aligned to 64 bytes so
+# it can be memory mapped straight into numpy arrays. Strings are stored
+# as fixed width unicode arrays
+SNAPSHOT_MAGIC = b"DSARNSNP"
+SNAPSHOT_VERSION = 3
+# magic, version, number of sections, source signature, section table crc
+SNAPSHOT_HEADER = struct.Struct("<8sIIQI")
+# name, dtype, byte offset, element count, data crc
+SNAPSHOT_SECTION = struct.Struct("<16s16sQQI4x")
+SNAPSHOT_ALIGN = 64
+
+class SnapshotError(Exception):
+    def __init__(self, message):
+        self.message = message
+
+# Arrays loaded from a snapshot file. graph is a DSAFrozenGraph over memory
+# mapped arrays, so processes loading the same file share its pages.
+# checksum identifies the snapshot's contents
+class Snapshot:
+    def __init__(self, sourceSignature, checksum, graph, vehicleIds,
+            vehicleLocations, vehicleDests, vehicleDistances, vehicleBatteries):
+        self.sourceSignature = sourceSignature
+        self.checksum = checksum
+        self.graph = graph
+        self.vehicleIds = vehicleIds
+        self.vehicleLocations = vehicleLocations
+        self.vehicleDests = vehicleDests
+        self.vehicleDistances = vehicleDistances
+        self.vehicleBatteries = vehicleBatteries
+
+    # Insert the saved vehicles into vTable, placed on network
+    def loadVehicles(self, network, vTable):
+        numVehicles = len(self.vehicleIds)
+        vTable.reserve(vTable.count + numVehicles)
+        for i in range(numVehicles):
+            vTable.insert(Vehicle(str(self.vehicleIds[i]),
+                    str(self.vehicleLocations[i]), str(self.vehicleDests[i]),
+                    int(self.vehicleDistances[i]), int(self.vehicleBatteries[i]),
+                    network))
+
+# Network and vehicles of a snapshot, left in its memory mapped arrays until
+# they are needed in another form. Queries use the frozen graph until the
+# first change thaws it into a DSAGraph, which is used from then on. The
+# vehicle table is filled from the snapshot the first time it is asked for.
+# Without a snapshot it holds an already built network and vehicle table
+class LazyNetwork:
+    def __init__(self, snapshot = None, network = None, vTable = None):
+        self._snapshot = snapshot
+        self._network = network
+        self._vTable = vTable
+
+    # Graph for read only queries, frozen until the network first changes
+    def getGraph(self):
+        graph = self._network
+        if graph is None:
+            graph = self._snapshot.graph
+        return graph
+
+    # DSAGraph to change, thawed from the snapshot on first use
+    def getNetwork(self):
+        if self._network is None:
+            self._network = self._snapshot.graph.thaw()
+        return self._network
+
+    def isThawed(self):
+        return self._network is not None
+
+    # Vehicle table, filled from the snapshot on first use. Loaded vehicles
+    # are placed on whichever graph is current, they only use it to check
+    # a new location or destination
+    def getVehicles(self):
+        if self._vTable is None:
+            self._vTable = VehicleHashTable(5)
+            self._snapshot.loadVehicles(self.getGraph(), self._vTable)
+        return self._vTable
+
+# Checksum of the contents of source files, read a chunk at a time. Saved
+# in a snapshot to tell if it was made from different files
+def sourceSignature(filenames):
+    signature = 0
+    for filename in filenames:
+        signature = zlib.crc32(filename.encode(), signature)
+        try:
+            with open(filename, "rb") as f:
+                chunk = f.read(CHUNK_SIZE)
+                while chunk:
+                    signature = zlib.crc32(chunk, signature)
+                    chunk = f.read(CHUNK_SIZE)
+        except FileNotFoundError:
+            signature = zlib.crc32(b"\0missing", signature)
+
+    return signature
+
+# Fixed width unicode array of strings, at least one character wide
+def _stringArray(strings):
+    width = 1
+    for string in strings:
+        width = max(width, len(string))
+    return np.array(strings, dtype = "<U" + str(width)).reshape(len(strings))
+
+# Returns the checksum identifying the saved contents
+def saveSnapshot(filename, network, vTable, signature = 0):
+    # Landmark table is saved with the network so routes from the snapshot
+    # can use ALT straight away
+    if not network.hasLandmarks():
+        network.buildLandmarks()
+    frozen = network.freeze()
+
+    vehicleList = vTable.getVehicleList()
+    numVehicles = vehicleList.size
+    vehicleIds = np.empty(numVehicles, dtype = object)
+    vehicleLocations = np.empty(numVehicles, dtype = object)
+    vehicleDests = np.empty(numVehicles, dtype = object)
+    vehicleDistances = np.empty(numVehicles, dtype = np.int64)
+    vehicleBatteries = np.empty(numVehicles, dtype = np.int64)
+    cur = vehicleList.head
+    for i in range(numVehicles):
+        vehicle = cur.data
+        vehicleIds[i] = vehicle._vehicleID
+        vehicleLocations[i] = vehicle._location
+        vehicleDests[i] = vehicle._dest
+        vehicleDistances[i] = int(vehicle._distDest)
+        vehicleBatteries[i] = int(vehicle._battery)
+        cur = cur.next
+
+    sections = (
+        ("labels", _stringArray(frozen.labels)),
+        ("latitudes", frozen.latitudes.astype("<f8")),
+        ("longitudes", frozen.longitudes.astype("<f8")),
+        ("indptr", frozen.indptr.astype("<i8")),
+        ("indices", frozen.indices.astype("<i4")),
+        ("weights", frozen.weights.astype("<i8")),
+        ("roadIds", frozen.roadIds.astype("<i4")),
+        ("roadNames", _stringArray(frozen.roadNames)),
+        ("components", frozen.components.astype("<i8")),
+        ("landmarkIds", frozen.landmarkIds.astype("<i8")),
+        ("landmarkDist", frozen.landmarkDist.astype("<f8").ravel()),
+        ("vehicleIds", _stringArray(vehicleIds)),
+        ("vehicleLocations", _stringArray(vehicleLocations)),
+        ("vehicleDests", _stringArray(vehicleDests)),
+        ("vehicleDistances", vehicleDistances.astype("<i8")),
+        ("vehicleBatteries", vehicleBatteries.astype("<i8")))
+
+    # Lay out the sections after the header and table
+    table = b""
+    offset = SNAPSHOT_HEADER.size + len(sections) * SNAPSHOT_SECTION.size
+    offsets = np.empty(len(sections), dtype = np.int64)
+    for i in range(len(sections)):
+        name, array = sections[i]
+        offset += -offset % SNAPSHOT_ALIGN
+        offsets[i] = offset
+        table += SNAPSHOT_SECTION.pack(name.encode(), array.dtype.str.encode(),
+                offset, len(array), zlib.crc32(array.tobytes()))
+        offset += array.nbytes
+
+    # Write beside the old file then swap it in, so processes that have the
+    # old snapshot mapped keep their pages
+    tempName = filename + ".tmp"
+    with open(tempName, "wb") as f:
+        f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION,
+                len(sections), signature, zlib.crc32(table)))
+        f.write(table)
+        for i in range(len(sections)):
+            f.write(b"\0" * (int(offsets[i]) - f.tell()))
+            f.write(sections[i][1].tobytes())
+    os.replace(tempName, filename)
+
+    return zlib.crc32(table)
+
+# Memory map the sections of a snapshot. Raises SnapshotError if the file
+# isnt a snapshot of this version or its section table is corrupt. Section
+# contents are only checked against their checksums when verify is True,
+# as that reads every page of the file
+def loadSnapshot(filename, verify = False):
+    with open(filename, "rb") as f:
+        header = f.read(SNAPSHOT_HEADER.size)
+        if len(header) < SNAPSHOT_HEADER.size:
+            raise SnapshotError("Snapshot file is truncated")
+        magic, version, numSections, signature, tableCrc = SNAPSHOT_HEADER.unpack(header)
+        if magic != SNAPSHOT_MAGIC:
+            raise SnapshotError("File is not a network snapshot")
+        if version != SNAPSHOT_VERSION:
+            raise SnapshotError("Snapshot version " + str(version) + " not supported")
+        table = f.read(numSections * SNAPSHOT_SECTION.size)
+
+    if len(table) < numSections * SNAPSHOT_SECTION.size or zlib.crc32(table) != tableCrc:
+        raise SnapshotError("Snapshot section table is corrupt")
+
+    fileSize = os.path.getsize(filename)
+    arrays = np.empty(numSections, dtype = object)
+    for i in range(numSections):
+        name, dtype, offset, count, crc = SNAPSHOT_SECTION.unpack_from(
+                table, i * SNAPSHOT_SECTION.size)
+        dtype = np.dtype(dtype.rstrip(b"\0").decode())
+        if offset + count * dtype.itemsize > fileSize:
+            raise SnapshotError("Snapshot file is truncated")
+
+        if count == 0:
+            array = np.empty(0, dtype = dtype)
+        else:
+            array = np.memmap(filename, dtype = dtype, mode = "r",
+                    offset = offset, shape = (count,))
+        if verify and zlib.crc32(array) != crc:
+            raise SnapshotError("Snapshot section " +
+                    name.rstrip(b"\0").decode() + " failed its checksum")
+        arrays[i] = array
+
+    (labels, latitudes, longitudes, indptr, indices, weights, roadIds,
+            roadNames, components, landmarkIds, landmarkDist, vehicleIds,
+            vehicleLocations, vehicleDests, vehicleDistances, vehicleBatteries) = arrays
+
+    # Landmark table is stored a row per landmark
+    landmarkDist = landmarkDist.reshape(len(landmarkIds), len(labels))
+    graph = DSAFrozenGraph(labels, None, indptr, indices, weights, roadIds,
+            roadNames, latitudes, longitudes, components, landmarkIds, landmarkDist)
+    return Snapshot(signature, tableCrc, graph, vehicleIds, vehicleLocations,
+            vehicleDests, vehicleDistances, vehicleBatteries)
+
+# Append only log of changes made since a snapshot, so they survive a
+# restart. The file is a header naming the snapshot it follows, then one
+# record per change: op code, payload length, payload and a crc of the three.
+# Records are buffered and written with one fsync per batch
+LOG_MAGIC = b"DSARNLOG"
+LOG_VERSION = 1
+# magic, version, checksum of the snapshot the log follows
+LOG_HEADER = struct.Struct("<8sIQ")
+# op code, payload length
+LOG_RECORD = struct.Struct("<BI")
+LOG_CRC = struct.Struct("<I")
+
+LOG_ADD_LOCATION = 1
+LOG_DELETE_LOCATION = 2
+LOG_ADD_ROAD = 3
+LOG_DELETE_ROAD = 4
+LOG_ADD_VEHICLE = 5
+LOG_DELETE_VEHICLE = 6
+
+# Payload fields of each op code: s string, d float, q integer
+LOG_FIELDS = ("", "sdd", "s", "sssq", "ss", "sssqq", "s")
+
+def _encodeRecord(op, values):
+    payload = bytearray()
+    fields = LOG_FIELDS[op]
+    for i in range(len(fields)):
+        if fields[i] == "s":
+            data = values[i].encode()
+            payload += struct.pack("<I", len(data)) + data
+        else:
+            payload += struct.pack("<" + fields[i], values[i])
+
+    record = LOG_RECORD.pack(op, len(payload)) + payload
+    return record + LOG_CRC.pack(zlib.crc32(record))
+
+def _decodeRecord(op, payload):
+    fields = LOG_FIELDS[op]
+    values = np.empty(len(fields), dtype = object)
+    pos = 0
+    for i in range(len(fields)):
+        if fields[i] == "s":
+            length = struct.unpack_from("<I", payload, pos)[0]
+            values[i] = payload[pos + 4:pos + 4 + length].decode()
+            pos += 4 + length
+        else:
+            values[i] = struct.unpack_from("<" + fields[i], payload, pos)[0]
+            pos += 8
+    return values
+
+# Apply the records of a log to the network and vehicles of a LazyNetwork,
+# which are only thawed and loaded if there are records. Returns the number
+# of records applied, the length of the file up to the last one applied and
+# whether a record failed, or None if the log doesnt follow the snapshot
+# with baseChecksum. A torn or corrupt record ends the replay, as it can
+# only be the last write
+def replayLog(filename, state, baseChecksum):
+    with open(filename, "rb") as f:
+        data = f.read()
+
+    result = None
+    if len(data) >= LOG_HEADER.size:
+        magic, version, checksum = LOG_HEADER.unpack_from(data, 0)
+        if magic == LOG_MAGIC and version == LOG_VERSION and checksum == baseChecksum:
+            result = _applyRecords(data, state)
+    return result
+
+def _applyRecords(data, state):
+    # Decode every whole record first, so the network and vehicle table can
+    # be sized once for everything the log adds. Each record is kept with
+    # the file position it ends at
+    records = DSALinkedList()
+    numLocations = 0
+    numVehicles = 0
+    pos = LOG_HEADER.size
+    valid = True
+
+    while valid and pos + LOG_RECORD.size <= len(data):
+        op, length = LOG_RECORD.unpack_from(data, pos)
+        end = pos + LOG_RECORD.size + length
+        valid = (0 < op < len(LOG_FIELDS) and end + LOG_CRC.size <= len(data) and
+                LOG_CRC.unpack_from(data, end)[0] == zlib.crc32(data[pos:end]))
+        if valid:
+            values = _decodeRecord(op, data[pos + LOG_RECORD.size:end])
+            pos = end + LOG_CRC.size
+            records.insertLast((op, values, pos))
+            if op == LOG_ADD_LOCATION:
+                numLocations += 1
+            elif op == LOG_ADD_VEHICLE:
+                numVehicles += 1
+
+    if records.size > 0:
+        network = state.getNetwork()
+        vTable = state.getVehicles()
+        network.reserve(numLocations)
+        vTable.reserve(vTable.count + numVehicles)
+
+    # Each change succeeded when logged and is applied to the same state in
+    # the same order, so it goes straight to the network or vehicle table.
+    # If the state isnt the one the log was written against a change can
+    # fail, replay stops there with everything before it applied
+    numApplied = 0
+    keepLength = LOG_HEADER.size
+    failed = False
+    cur = records.head
+    while cur is not None and not failed:
+        op, values, end = cur.data
+        try:
+            if op == LOG_ADD_LOCATION:
+                latitude = None if np.isnan(values[1]) else values[1]
+                longitude = None if np.isnan(values[2]) else values[2]
+                network.addVertex(values[0], latitude, longitude)
+            elif op == LOG_DELETE_LOCATION:
+                network.deleteVertex(values[0])
+            elif op == LOG_ADD_ROAD:
+                network.addEdge(values[0], values[1], values[2], values[3])
+            elif op == LOG_DELETE_ROAD:
+                network.removeEdge(values[0], values[1])
+            elif op == LOG_ADD_VEHICLE:
+                vTable.insert(Vehicle(values[0], values[1], values[2], values[3],
+                        values[4], network))
+            else:
+                vTable.delete(values[0])
+            numApplied += 1
+            keepLength = end
+        except (DuplicateVertexError, VertexNotFoundError, DuplicateEdgeError,
+                KeyNotFoundError) as err:
+            print("Replay stopped at change", numApplied + 1, "of", records.size,
+                    "-", err.message)
+            failed = True
+        cur = cur.next
+
+    return numApplied, keepLength, failed
+
+# Copy or move a log out of the way so a new log never overwrites it. It is
+# named after the snapshot checksum in its header, with a count added if
+# that name is taken. Returns the name it was kept as
+def _keepLogAside(filename, move):
+    with open(filename, "rb") as f:
+        header = f.read(LOG_HEADER.size)
+    checksum = 0
+    if len(header) == LOG_HEADER.size:
+        checksum = LOG_HEADER.unpack(header)[2]
+
+    asideName = filename + "." + str(checksum)
+    count = 0
+    while os.path.exists(asideName):
+        count += 1
+        asideName = filename + "." + str(checksum) + "." + str(count)
+
+    if move:
+        os.rename(filename, asideName)
+    else:
+        shutil.copyfile(filename, asideName)
+    return asideName
+
+# Replay the log at filename onto state, a LazyNetwork, if it follows the
+# snapshot with baseChecksum and open it for more changes, otherwise start
+# a new log. Returns the log and the number of changes replayed. A log
+# holding changes that arent replayed is kept aside with a warning, either
+# all of it when it follows another snapshot, or a copy when a change in
+# it fails and the log is cut back to the changes applied
+def openMutationLog(filename, baseChecksum, state, batchSize = 64):
+    result = None
+    try:
+        result = replayLog(filename, state, baseChecksum)
+    except FileNotFoundError:
+        result = None
+
+    numReplayed = 0
+    keepLength = -1
+    if result is not None:
+        numReplayed, keepLength, failed = result
+        if failed:
+            asideName = _keepLogAside(filename, False)
+            print("Changes after the failed one are not applied, full log kept as",
+                    asideName)
+    elif os.path.exists(filename) and os.path.getsize(filename) > LOG_HEADER.size:
+        asideName = _keepLogAside(filename, True)
+        print(filename, "does not follow the loaded snapshot, its changes are",
+                "not applied and it is kept as", asideName)
+
+    log = MutationLog(filename, baseChecksum, batchSize, keepLength)
+    log.recordCount = numReplayed
+    return log, numReplayed
+
+class MutationLog:
+    # keepLength is the length of an existing log to append to, anything
+    # after it is cut off. -1 starts a new log
+    def __init__(self, filename, baseChecksum, batchSize = 64, keepLength = -1):
+        self.filename = filename
+        self.baseChecksum = baseChecksum
+        self.batchSize = batchSize
+        self.recordCount = 0
+        self._pending = bytearray()
+        self._numPending = 0
+
+        if keepLength < 0:
+            self._writeHeader()
+        else:
+            os.truncate(filename, keepLength)
+        self._file = open(filename, "ab")
+
+    def _writeHeader(self):
+        tempName = self.filename + ".tmp"
+        with open(tempName, "wb") as f:
+            f.write(LOG_HEADER.pack(LOG_MAGIC, LOG_VERSION, self.baseChecksum))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tempName, self.filename)
+
+    def _append(self, op, values):
+        self._pending += _encodeRecord(op, values)
+        self._numPending += 1
+        self.recordCount += 1
+        if self._numPending >= self.batchSize:
+            self.sync()
+
+    def addLocation(self, label, latitude = None, longitude = None):
+        self._append(LOG_ADD_LOCATION, (label,
+                np.nan if latitude is None else latitude,
+                np.nan if longitude is None else longitude))
+
+    def deleteLocation(self, label):
+        self._append(LOG_DELETE_LOCATION, (label,))
+
+    def addRoad(self, label1, label2, roadName, distance):
+        self._append(LOG_ADD_ROAD, (label1, label2, roadName, distance))
+
+    def deleteRoad(self, label1, label2):
+        self._append(LOG_DELETE_ROAD, (label1, label2))
+
+    def addVehicle(self, vehicle):
+        self._append(LOG_ADD_VEHICLE, (vehicle._vehicleID, vehicle._location,
+                vehicle._dest, int(vehicle._distDest), int(vehicle._battery)))
+
+    def deleteVehicle(self, vehicleID):
+        self._append(LOG_DELETE_VEHICLE, (vehicleID,))
+
+    # Write buffered records and wait for them to reach the disk
+    def sync(self):
+        if self._numPending > 0:
+            self._file.write(self._pending)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._pending = bytearray()
+            self._numPending = 0
+
+    def close(self):
+        self.sync()
+        self._file.close()
+
+    # Fold the logged changes into a new snapshot and start an empty log
+    # after it. If the snapshot cant be saved the log carries on as it was.
+    # If interrupted between the two, the old log no longer matches the new
+    # snapshot and is kept aside when next opened, its changes already saved
+    def compact(self, snapshotFile, network, vTable, signature = 0):
+        self.close()
+        try:
+            self.baseChecksum = saveSnapshot(snapshotFile, network, vTable, signature)
+            self._writeHeader()
+            self.recordCount = 0
+        finally:
+            self._file = open(self.filename, "ab")
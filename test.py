@@ -1,6 +1,10 @@
 #Name: Michael Durkan
 # Test code for vehicles
 
+import os
+import random
+import tempfile
+
 from DSALinkedList import DSALinkedList, ListEmptyError
 from DSAsorts import selectionSort
 from DSAQueue import DSAQueue, QueueUnderflowError
@@ -8,6 +12,9 @@ from DSAStack import DSAStack, StackUnderflowError
 from DSARoadGraph import DSAGraph, _DSAGraphEdge, _DSAGraphVertex, VertexNotFoundError, DuplicateVertexError, DuplicateEdgeError
 from Vehicle import Vehicle
 from VehicleHashTable import VehicleHashTable, KeyNotFoundError
+from DSAHashTable import DSAHashTable
+from DSAContractionHierarchy import DSAContractionHierarchy
+from fileioNetwork import saveSnapshot, loadSnapshot, openMutationLog, LazyNetwork
 from VehicleSort import find_nearest_vehicle, find_vehicle_with_highest_battery, heapSortDistanceAsc, quickSortBattery, heapSortDistanceTo
 
 def main():
@@ -117,5 +124,201 @@ def main():
     highestBattery = find_vehicle_with_highest_battery(vehicleList)
     print(highestBattery)
 
+    # Testing frozen snapshot of graph
+    print("Testing frozen graph snapshot")
+    frozen = g1.freeze()
+    print(frozen.getAdjacent("Perth"))
+    print(frozen.getEdge("Perth", "Midland"))
+    print(frozen.is_path("Mandurah", "Serpentine"))
+    print(frozen.is_path("Subiaco", "Fremantle"))
+    frozen.depthFirstSearch()
+    hops, parents = frozen.hopDistances("Perth")
+    print("Roads from Perth to Mandurah: " + str(hops[frozen.getVertexId("Mandurah")]))
+
+    # Testing shortest path
+    print("Testing shortest route Mandurah to Serpentine")
+    print(g1.shortestPath("Mandurah", "Serpentine"))
+    print(g1.shortestPath("Subiaco", "Perth"))
+
+    # Testing bidirectional shortest path
+    print("Testing bidirectional route Mandurah to Serpentine")
+    oneWay = g1.shortestPath("Mandurah", "Serpentine")
+    biRoute = g1.shortestPathBidirectional("Mandurah", "Serpentine")
+    print(biRoute)
+    print("Settled one direction: " + str(oneWay.getSettledCount()) +
+            ", bidirectional: " + str(biRoute.getSettledCount()))
+    print(g1.shortestPathBidirectional("Subiaco", "Perth"))
+
+    # Testing A* route with location coordinates
+    print("Testing A* route Perth to Mandurah with coordinates")
+    g2 = DSAGraph()
+    g2.addVertex("Perth", -31.95, 115.86)
+    g2.addVertex("Fremantle", -32.06, 115.74)
+    g2.addVertex("Rockingham", -32.28, 115.73)
+    g2.addVertex("Mandurah", -32.53, 115.72)
+    g2.addVertex("Armadale", -32.15, 116.01)
+    g2.addEdge("Perth", "Fremantle", "Stirling Hwy", 19)
+    g2.addEdge("Fremantle", "Rockingham", "Cockburn Rd", 30)
+    g2.addEdge("Rockingham", "Mandurah", "Mandurah Rd", 30)
+    g2.addEdge("Perth", "Armadale", "Albany Hwy", 40)
+    g2.addEdge("Armadale", "Mandurah", "South West Hwy", 60)
+    aStarRoute = g2.shortestPathAStar("Perth", "Mandurah")
+    print(aStarRoute)
+    print("Settled Dijkstra: " + str(g2.shortestPath("Perth", "Mandurah").getSettledCount()) +
+            ", A*: " + str(aStarRoute.getSettledCount()))
+
+    # Testing ALT route with saved and loaded landmarks
+    print("Testing ALT route Mandurah to Serpentine")
+    g1.buildLandmarks(2)
+    landmarkFile = os.path.join(tempfile.gettempdir(), "test_landmarks.npz")
+    g1.saveLandmarks(landmarkFile)
+    print("Landmarks loaded: " + str(g1.loadLandmarks(landmarkFile)))
+    print(g1.shortestPathALT("Mandurah", "Serpentine"))
+    g1.deleteEdge("Perth", "Midland")
+    print("Landmarks loaded after road change: " + str(g1.loadLandmarks(landmarkFile)))
+    os.remove(landmarkFile)
+
+    # Testing contraction hierarchy routes
+    print("Testing contraction hierarchy route Mandurah to Serpentine")
+    hierarchy = DSAContractionHierarchy(g1)
+    hierarchy.build()
+    print(hierarchy.shortestPath("Mandurah", "Serpentine"))
+    print(hierarchy.shortestPath("Subiaco", "Perth"))
+    print("Shortcuts added: " + str(hierarchy.numShortcuts))
+
+    # Testing is_path after closing and reopening roads
+    print("Testing is_path after closing Armadale roads")
+    g2.deleteEdge("Perth", "Armadale")
+    g2.deleteEdge("Armadale", "Mandurah")
+    print(g2.is_path("Perth", "Armadale"))
+    g2.addEdge("Perth", "Armadale", "Albany Hwy", 40)
+    print(g2.is_path("Mandurah", "Armadale"))
+
+    # Testing traversal generators with start and limits
+    print("Testing traversals from Perth within 1 road and 50km")
+    print(list(g2.breadthFirstTraversal("Perth", maxDepth = 1)))
+    print(list(g2.depthFirstTraversal("Perth", maxDistance = 50)))
+
+    # Testing vertex ids stay dense after a delete
+    print("Testing vertex ids after deleting Perth")
+    g2.deleteVertex("Perth")
+    print([g2.getLabel(i) for i in range(g2.getVertexCount())])
+    print(g2.getVertexId("Armadale"))
+
+    # Testing binary snapshot save and memory mapped load
+    print("Testing snapshot of network and vehicles")
+    snapshotFile = os.path.join(tempfile.gettempdir(), "test_network.snap")
+    saveSnapshot(snapshotFile, g1, vTable, 7)
+    snapshot = loadSnapshot(snapshotFile, verify = True)
+    print(snapshot.sourceSignature)
+    print(snapshot.graph.getEdge("Perth", "Rockingham"))
+    restored = VehicleHashTable(5)
+    snapshot.loadVehicles(snapshot.graph.thaw(), restored)
+    print(restored.search("V001"), end = "")
+    del snapshot
+    os.remove(snapshotFile)
+
+    # Testing mutation log replay onto a copy of the network
+    print("Testing mutation log replay")
+    logFile = os.path.join(tempfile.gettempdir(), "test_network.log")
+    if os.path.exists(logFile):
+        os.remove(logFile)
+    log, numReplayed = openMutationLog(logFile, 7, LazyNetwork(None, g1, vTable))
+    log.addLocation("Kwinana", -32.24, 115.77)
+    log.addRoad("Kwinana", "Rockingham", "Patterson Rd", 12)
+    log.deleteRoad("Perth", "Rockingham")
+    log.deleteVehicle("V001")
+    log.close()
+    copy = g1.freeze().thaw()
+    copyTable = VehicleHashTable(5)
+    copyTable.insert(vTable.search("V001"))
+    log, numReplayed = openMutationLog(logFile, 7, LazyNetwork(None, copy, copyTable))
+    log.close()
+    print(numReplayed)
+    print(copy.getEdge("Kwinana", "Rockingham"))
+    print(copy.isAdjacent("Perth", "Rockingham"))
+    print(copyTable.hasKey("V001"))
+    os.remove(logFile)
+
+    # Testing probe lengths of the vehicle table
+    print("Testing vehicle table probe statistics")
+    print(vTable.getProbeStats())
+
+    # Testing incremental resize keeps every vehicle reachable
+    print("Testing incremental resize of vehicle table")
+    growing = VehicleHashTable(5, incremental = True)
+    for i in range(50):
+        growing.insert(Vehicle("T" + str(i), "Perth", "Perth", i, 50, g1))
+    growing.delete("T7")
+    print(growing.count, growing.search("T42").getDistanceToDestination(), growing.hasKey("T7"))
+
+    # Testing Robin Hood probing with backward shift deletion
+    print("Testing Robin Hood vehicle table")
+    robin = VehicleHashTable(5, robinHood = True)
+    for i in range(50):
+        robin.insert(Vehicle("T" + str(i), "Perth", "Perth", i, 50, g1))
+    for i in range(0, 50, 3):
+        robin.delete("T" + str(i))
+    print(robin.count, robin.search("T41").getDistanceToDestination(), robin.hasKey("T42"))
+
+    # Testing A* on a network where only some locations have coordinates
+    print("Testing A* with mixed coordinates")
+    g3 = DSAGraph()
+    g3.addVertex("Gingin", -31.36, 115.43)
+    g3.addVertex("Bindoon")
+    g3.addVertex("Moora")
+    g3.addVertex("Lancelin", -31.74, 115.0)
+    g3.addEdge("Gingin", "Bindoon", "Great Northern Hwy", 47)
+    g3.addEdge("Gingin", "Moora", "Midlands Rd", 24)
+    g3.addEdge("Bindoon", "Moora", "Bindoon Moora Rd", 77)
+    g3.addEdge("Moora", "Lancelin", "Lancelin Rd", 80)
+    print(g3.shortestPath("Bindoon", "Lancelin").getDistance())
+    print(g3.shortestPathAStar("Bindoon", "Lancelin").getDistance())
+
+    # Testing a log that fails to replay or follows another snapshot is kept
+    print("Testing mutation log kept aside")
+    logFile = os.path.join(tempfile.gettempdir(), "test_aside.log")
+    for name in (logFile, logFile + ".7", logFile + ".7.1"):
+        if os.path.exists(name):
+            os.remove(name)
+    log, numReplayed = openMutationLog(logFile, 7, LazyNetwork(None, DSAGraph(), VehicleHashTable(5)))
+    log.addLocation("Gingin")
+    log.deleteLocation("Moora")
+    log.addLocation("Lancelin")
+    log.close()
+    g4 = DSAGraph()
+    log, numReplayed = openMutationLog(logFile, 7, LazyNetwork(None, g4, VehicleHashTable(5)))
+    log.close()
+    print(numReplayed, g4.getVertexCount(), os.path.exists(logFile + ".7"))
+    log, numReplayed = openMutationLog(logFile, 8, LazyNetwork(None, DSAGraph(), VehicleHashTable(5)))
+    log.close()
+    print(numReplayed, os.path.getsize(logFile + ".7") > os.path.getsize(logFile + ".7.1"))
+    for name in (logFile, logFile + ".7", logFile + ".7.1"):
+        os.remove(name)
+
+    # Testing DSAHashTable against a dict with random inserts, deletes and lookups
+    print("Testing DSAHashTable against dict")
+    rng = random.Random(23)
+    hTable = DSAHashTable()
+    expected = {}
+    matches = True
+    for i in range(20000):
+        key = "Loc" + str(rng.randrange(500))
+        action = rng.random()
+        if action < 0.5:
+            hTable.insert(key, i)
+            expected[key] = i
+        elif action < 0.8:
+            if key in expected:
+                hTable.delete(key)
+                del expected[key]
+            else:
+                matches = matches and not hTable.hasKey(key)
+        else:
+            matches = matches and hTable.lookup(key) == expected.get(key)
+        matches = matches and hTable.getCount() == len(expected)
+    for key in expected:
+        matches = matches and hTable.search(key) == expected[key]
+    print(matches, hTable.getCount() == len(expected))
 
 main()